@@ -1,15 +1,21 @@
+import asyncio
 import json
 import logging
 from typing import Literal
 
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
 from fastapi import FastAPI, Request, Response, Depends, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse, FileResponse, StreamingResponse
+from fastapi.responses import (
+    RedirectResponse,
+    FileResponse,
+    StreamingResponse,
+    PlainTextResponse,
+)
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
+from api.responses import PreValidatedJSONResponse
 from db import database, crud, schemas
 from db.config import settings
 from streaming_providers.exceptions import ProviderException
@@ -21,7 +27,18 @@ from streaming_providers.debridlink.api import router as debridlink_router
 from streaming_providers.debridlink.utils import get_direct_link_from_debridlink
 from utils import crypto, torrent, poster
 from utils.const import CATALOG_ID_DATA, CATALOG_NAME_DATA
+from utils.imdb_resolver import imdb_resolver
+from utils.metrics import (
+    RequestMetricsMiddleware,
+    ServerTimingMiddleware,
+    get_lru_cache_stats,
+    get_metrics_dict_stats,
+    registry,
+    timed_phase,
+)
 from scrappers import tamil_blasters, tamilmv
+from scrappers.scheduler import AdaptiveScrapeScheduler
+from scrappers.torrent_store import torrent_store
 
 logging.basicConfig(
     format="%(levelname)s::%(asctime)s - %(message)s",
@@ -37,6 +54,10 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestMetricsMiddleware)
+app.add_middleware(
+    ServerTimingMiddleware, sample_rate=settings.server_timing_sample_rate
+)
 app.mount("/static", StaticFiles(directory="resources"), name="static")
 TEMPLATES = Jinja2Templates(directory="resources")
 headers = {
@@ -50,6 +71,16 @@ no_cache_headers = {
     "Expires": "0",
 }
 
+registry.register_cache("search", get_metrics_dict_stats(crud.search_cache.metrics))
+registry.register_cache(
+    "catalog_cursors", get_metrics_dict_stats(crud.catalog_cursors.metrics)
+)
+registry.register_cache(
+    "user_data", get_lru_cache_stats(crypto.get_user_data_cache_info)
+)
+registry.register_cache("imdb", get_metrics_dict_stats(imdb_resolver.metrics))
+registry.register_cache("torrent_store", get_metrics_dict_stats(torrent_store.metrics))
+
 @app.on_event("startup")
 async def init_db():
     try:
@@ -57,6 +88,39 @@ async def init_db():
         await database.init()
     except Exception as e:
         print(f"Error during database initialization: {e}")
+    # Built in the background, the search uses the text index until it's ready
+    app.state.search_index_task = asyncio.create_task(rebuild_search_indexes())
+    app.state.search_prefetch_task = asyncio.create_task(prefetch_popular_searches())
+
+
+async def rebuild_search_indexes():
+    """
+    Builds the title search indexes and rebuilds them periodically, picking up the
+    metadata saved by the scrapers running in the other processes.
+    """
+    while True:
+        try:
+            await crud.rebuild_search_indexes()
+        except Exception as e:
+            logging.error(f"Error while building the search indexes: {e}")
+        await asyncio.sleep(settings.search_index_rebuild_interval)
+
+
+async def prefetch_popular_searches():
+    """
+    Refreshes the cached results of the popular searches as they expire.
+    """
+    while True:
+        await asyncio.sleep(settings.search_cache_ttl / 2)
+        try:
+            await crud.prefetch_popular_searches()
+        except Exception as e:
+            logging.error(f"Error while prefetching the popular searches: {e}")
+
+
+def get_user_data(secret_str: str = None) -> schemas.UserData:
+    with timed_phase("decrypt"):
+        return crypto.decrypt_user_data(secret_str)
 
 
 @app.post("/start-scheduler")
@@ -67,21 +131,37 @@ async def start_scheduler_endpoint(background_tasks: BackgroundTasks):
 
 async def start_scheduler():
     scheduler = AsyncIOScheduler()
-    scheduler.add_job(
-        tamil_blasters.run_schedule_scrape,
-        CronTrigger(hour="*/3"),
-        name="tamil_blasters",
-    )
-    scheduler.add_job(
-        tamilmv.run_schedule_scrape, CronTrigger(hour="*/3"), name="tamilmv"
+    # Each forum gets its own interval based on its new topics rate
+    forum_scheduler = AdaptiveScrapeScheduler(
+        scheduler, [tamil_blasters.source, tamilmv.source]
     )
+    forum_scheduler.start()
     scheduler.start()
     app.state.scheduler = scheduler
+    app.state.forum_scheduler = forum_scheduler
+
+
+@app.get("/scheduler/forums")
+async def get_forum_schedule(response: Response):
+    response.headers.update(no_cache_headers)
+    if not hasattr(app.state, "forum_scheduler"):
+        raise HTTPException(status_code=404, detail="Scheduler is not started")
+    return {"forums": app.state.forum_scheduler.get_schedule()}
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+async def get_metrics():
+    return PlainTextResponse(
+        registry.render(),
+        media_type="text/plain; version=0.0.4",
+        headers=no_cache_headers,
+    )
 
 
 @app.on_event("shutdown")
 async def stop_scheduler():
     app.state.scheduler.shutdown(wait=False)
+    await app.state.forum_scheduler.close()
 
 @app.post("/start-jobs")
 async def start_jobs_endpoint(background_tasks: BackgroundTasks):
@@ -160,7 +240,7 @@ async def get_manifest(
         manifest = json.load(file)
 
     filtered_catalogs = [
-        cat for cat in manifest["catalogs"] if cat["id"] in user_data.selected_catalogs
+        cat for cat in manifest["catalogs"] if cat["id"] in user_data.selected_catalog_set
     ]
     manifest["catalogs"] = filtered_catalogs
     return manifest
@@ -195,15 +275,15 @@ async def get_manifest(
     tags=["catalog"],
 )
 async def get_catalog(
-    response: Response,
     catalog_type: Literal["movie", "series"],
     catalog_id: str,
     skip: int = 0,
 ):
-    response.headers.update(headers)
     metas = schemas.Metas()
-    metas.metas.extend(await crud.get_meta_list(catalog_type, catalog_id, skip))
-    return metas
+    with timed_phase("db"):
+        metas.metas.extend(await crud.get_meta_list(catalog_type, catalog_id, skip))
+    with timed_phase("render"):
+        return PreValidatedJSONResponse(metas, by_alias=False, headers=headers)
 
 
 @app.get(
@@ -213,15 +293,15 @@ async def get_catalog(
     response_model_exclude_none=True,
 )
 async def search_movie(
-    response: Response,
     catalog_type: Literal["movie", "series"],
     catalog_id: Literal["mediafusion_search_movies", "mediafusion_search_series"],
     search_query: str,
 ):
-    response.headers.update(headers)
     logging.debug("Searching for %s : %s", catalog_id, search_query)
 
-    return await crud.process_search_query(search_query, catalog_type)
+    return PreValidatedJSONResponse(
+        await crud.process_search_query(search_query, catalog_type), headers=headers
+    )
 
 
 @app.get(
@@ -236,10 +316,7 @@ async def search_movie(
     response_model=schemas.MetaItem,
     response_model_exclude_none=True,
 )
-async def get_meta(
-    catalog_type: Literal["movie", "series"], meta_id: str, response: Response
-):
-    response.headers.update(headers)
+async def get_meta(catalog_type: Literal["movie", "series"], meta_id: str):
     if catalog_type == "movie":
         data = await crud.get_movie_meta(meta_id)
     else:
@@ -248,7 +325,8 @@ async def get_meta(
     if not data:
         raise HTTPException(status_code=404, detail="Meta ID not found.")
 
-    return data
+    # Meta dicts are built with the "_id" & "title" output keys of the MetaItem schema
+    return PreValidatedJSONResponse(data, headers=headers)
 
 
 @app.get(
@@ -278,14 +356,11 @@ async def get_meta(
 async def get_streams(
     catalog_type: Literal["movie", "series"],
     video_id: str,
-    response: Response,
     secret_str: str = None,
     season: int = None,
     episode: int = None,
-    user_data: schemas.UserData = Depends(crypto.decrypt_user_data),
+    user_data: schemas.UserData = Depends(get_user_data),
 ):
-    response.headers.update(headers)
-
     if catalog_type == "movie":
         fetched_streams = await crud.get_movie_streams(user_data, secret_str, video_id)
     else:
@@ -293,7 +368,8 @@ async def get_streams(
             user_data, secret_str, video_id, season, episode
         )
 
-    return {"streams": fetched_streams}
+    with timed_phase("render"):
+        return PreValidatedJSONResponse({"streams": fetched_streams}, headers=headers)
 
 
 @app.post("/encrypt-user-data", tags=["user_data"])
@@ -313,11 +389,12 @@ async def streaming_provider_endpoint(
     response.headers.update(headers)
     response.headers.update(no_cache_headers)
 
-    user_data = crypto.decrypt_user_data(secret_str)
+    user_data = get_user_data(secret_str)
     if not user_data.streaming_provider:
         raise HTTPException(status_code=400, detail="No streaming provider set.")
 
-    stream = await crud.get_stream_by_info_hash(info_hash)
+    with timed_phase("db"):
+        stream = await crud.get_stream_by_info_hash(info_hash)
     if not stream:
         raise HTTPException(status_code=400, detail="Stream not found.")
 
@@ -326,18 +403,19 @@ async def streaming_provider_endpoint(
     episode_data = stream.get_episode(season, episode)
 
     try:
-        if user_data.streaming_provider.service == "seedr":
-            video_url = await get_direct_link_from_seedr(
-                info_hash, magnet_link, user_data, stream, episode_data, 3, 1
-            )
-        elif user_data.streaming_provider.service == "realdebrid":
-            video_url = get_direct_link_from_realdebrid(
-                info_hash, magnet_link, user_data, stream, episode_data, 3, 1
-            )
-        else:
-            video_url = get_direct_link_from_debridlink(
-                info_hash, magnet_link, user_data, stream, episode_data, 3, 1
-            )
+        with timed_phase("provider"):
+            if user_data.streaming_provider.service == "seedr":
+                video_url = await get_direct_link_from_seedr(
+                    info_hash, magnet_link, user_data, stream, episode_data, 3, 1
+                )
+            elif user_data.streaming_provider.service == "realdebrid":
+                video_url = get_direct_link_from_realdebrid(
+                    info_hash, magnet_link, user_data, stream, episode_data, 3, 1
+                )
+            else:
+                video_url = get_direct_link_from_debridlink(
+                    info_hash, magnet_link, user_data, stream, episode_data, 3, 1
+                )
     except ProviderException as error:
         logging.info("Exception occurred: %s", error.message)
         video_url = f"{settings.host_url}/static/exceptions/{error.video_file_name}"
@@ -348,16 +426,18 @@ async def streaming_provider_endpoint(
 @app.get("/poster/{catalog_type}/{mediafusion_id}.jpg", tags=["poster"])
 async def get_poster(catalog_type: Literal["movie", "series"], mediafusion_id: str):
     # Query the MediaFusion data
-    if catalog_type == "movie":
-        mediafusion_data = await crud.get_movie_data_by_id(mediafusion_id)
-    else:
-        mediafusion_data = await crud.get_series_data_by_id(mediafusion_id)
+    with timed_phase("db"):
+        if catalog_type == "movie":
+            mediafusion_data = await crud.get_movie_data_by_id(mediafusion_id)
+        else:
+            mediafusion_data = await crud.get_series_data_by_id(mediafusion_id)
 
     if not mediafusion_data:
         raise HTTPException(status_code=404, detail="MediaFusion ID not found.")
 
     try:
-        image_byte_io = await poster.create_poster(mediafusion_data)
+        with timed_phase("render"):
+            image_byte_io = await poster.create_poster(mediafusion_data)
         return StreamingResponse(
             image_byte_io, media_type="image/jpeg", headers=headers
         )
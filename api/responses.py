@@ -0,0 +1,32 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+
+class PreValidatedJSONResponse(JSONResponse):
+    """
+    Serializes the already validated route data with orjson. Returning this response
+    skips the response_model re-validation, while the route's response_model still
+    documents the OpenAPI schema. Pydantic models are dumped with the route options.
+    """
+
+    def __init__(
+        self,
+        content: Any,
+        exclude_none: bool = True,
+        by_alias: bool = True,
+        **kwargs,
+    ):
+        self.exclude_none = exclude_none
+        self.by_alias = by_alias
+        super().__init__(content, **kwargs)
+
+    def serialize_model(self, obj: Any) -> Any:
+        if isinstance(obj, BaseModel):
+            return obj.model_dump(exclude_none=self.exclude_none, by_alias=self.by_alias)
+        raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=self.serialize_model)
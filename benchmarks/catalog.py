@@ -0,0 +1,52 @@
+import argparse
+import asyncio
+import time
+
+from db import crud, database, schemas
+from db.models import CatalogEntry
+
+
+async def benchmark_catalog(catalog_type: str, catalog: str, pages: list[int]):
+    for page in pages:
+        skip = (page - 1) * 25
+
+        start_time = time.perf_counter()
+        await (
+            CatalogEntry.find({"catalog": catalog, "type": catalog_type})
+            .sort(crud.CATALOG_SORT)
+            .skip(skip)
+            .limit(25)
+            .project(schemas.CatalogMeta)
+            .to_list()
+        )
+        offset_time = (time.perf_counter() - start_time) * 1000
+
+        crud.catalog_cursors.invalidate([catalog])
+        start_time = time.perf_counter()
+        await crud.get_meta_list(catalog_type, catalog, skip)
+        cold_time = (time.perf_counter() - start_time) * 1000
+
+        start_time = time.perf_counter()
+        await crud.get_meta_list(catalog_type, catalog, skip)
+        warm_time = (time.perf_counter() - start_time) * 1000
+
+        print(
+            f"page {page:4}: skip/limit {offset_time:8.2f} ms, "
+            f"keyset cold {cold_time:8.2f} ms, keyset cached cursor {warm_time:8.2f} ms"
+        )
+
+
+async def run_benchmark(catalog_type: str, catalog: str, pages: list[int]):
+    await database.init()
+    await benchmark_catalog(catalog_type, catalog, pages)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the catalog pagination, skip/limit against keyset"
+    )
+    parser.add_argument("catalog_type", choices=["movie", "series"])
+    parser.add_argument("catalog", help="catalog id. ex: tamil_hdrip")
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 20, 200])
+    args = parser.parse_args()
+    asyncio.run(run_benchmark(args.catalog_type, args.catalog, args.pages))
@@ -0,0 +1,70 @@
+import argparse
+import time
+import tracemalloc
+from pathlib import Path
+
+from scrappers.html_parser import HTMLNode, get_available_backends, parse_html
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+
+def extract_listing(page: HTMLNode) -> list[str]:
+    return [movie.get("data-rowid") for movie in page.select("li[data-rowid]")]
+
+
+def extract_topic(page: HTMLNode) -> dict:
+    poster_element = page.select_one("div[data-commenttype='forums'] img")
+    datetime_element = page.select_one("time")
+    return {
+        "poster": poster_element.get("data-src") or poster_element.get("src")
+        if poster_element
+        else None,
+        "created_at": datetime_element.get("datetime") if datetime_element else None,
+        "torrents": [
+            element.get("href")
+            for element in page.select("a[data-fileext='torrent']")
+        ],
+    }
+
+
+def run_benchmark(fixtures: list[Path], backends: list[str], rounds: int):
+    for fixture in fixtures:
+        content = fixture.read_bytes()
+        is_listing = b"data-rowid" in content
+        parse_only = ("li", "data-rowid") if is_listing else None
+        extract = extract_listing if is_listing else extract_topic
+
+        for backend in backends:
+            # tracemalloc only sees the python allocations, the selectolax tree
+            # is allocated in C and is not included in its peak memory.
+            tracemalloc.start()
+            start_time = time.process_time()
+            for _ in range(rounds):
+                extract(parse_html(content, parse_only, backend))
+            cpu_time = (time.process_time() - start_time) / rounds * 1000
+            _, peak_memory = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            print(
+                f"{fixture.name:40} {backend:12} "
+                f"{cpu_time:8.2f} ms/page {peak_memory / 1024:10.1f} KiB peak"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the HTML parser backends over forum pages"
+    )
+    parser.add_argument(
+        "fixtures",
+        nargs="*",
+        type=Path,
+        default=[FIXTURES_DIR],
+        help="html pages or directories. default: the bundled listing & topic pages",
+    )
+    parser.add_argument("-r", "--rounds", type=int, default=10)
+    args = parser.parse_args()
+
+    fixture_files = []
+    for path in args.fixtures:
+        fixture_files.extend(sorted(path.glob("*.html")) if path.is_dir() else [path])
+    run_benchmark(fixture_files, get_available_backends(), args.rounds)
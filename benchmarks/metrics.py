@@ -0,0 +1,38 @@
+import argparse
+import time
+
+from utils.metrics import Counter, Histogram
+
+
+def run_benchmark(rounds: int):
+    """
+    Overhead of the instrumentation on the request path, per call.
+    """
+    histogram = Histogram("benchmark_seconds", "Benchmark.", ("route",))
+    counter = Counter("benchmark_total", "Benchmark.", ("route",))
+    routes = [f"/route/{index}" for index in range(20)]
+
+    start_time = time.perf_counter()
+    for index in range(rounds):
+        histogram.observe(index % 1000 / 1000, routes[index % 20])
+    observe_time = (time.perf_counter() - start_time) / rounds * 1e6
+
+    start_time = time.perf_counter()
+    for index in range(rounds):
+        counter.inc(routes[index % 20])
+    inc_time = (time.perf_counter() - start_time) / rounds * 1e6
+
+    start_time = time.perf_counter()
+    histogram.render()
+    render_time = (time.perf_counter() - start_time) * 1000
+
+    print(
+        f"histogram observe: {observe_time:.3f} µs, counter inc: {inc_time:.3f} µs, "
+        f"render of 20 histograms: {render_time:.2f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the metrics overhead")
+    parser.add_argument("-r", "--rounds", type=int, default=1000000)
+    run_benchmark(parser.parse_args().rounds)
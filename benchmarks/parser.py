@@ -0,0 +1,71 @@
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from db.models import Streams, Episode, Season
+from db.schemas import UserData, StreamingProvider
+from utils.parser import parse_stream_data, set_stream_descriptors
+
+
+def get_benchmark_streams(count: int, precomputed: bool) -> list[Streams]:
+    streams = []
+    for index in range(count):
+        stream = Streams.model_construct(
+            id=f"{index:040x}",
+            torrent_name=f"Movie {index} (2023) 1080p WEB-DL x264 AAC",
+            size=(index + 1) * 734003200,
+            announce_list=[],
+            languages=["Tamil", "Telugu", "Hindi"],
+            source="TamilMV",
+            catalog=["tamil_series"],
+            created_at=datetime(2023, 1, 1) + timedelta(minutes=index),
+            resolution="1080p",
+            codec="x264",
+            quality="WEB-DL",
+            audio="AAC",
+            cached=None,
+            description=None,
+            binge_group=None,
+            season=Season(
+                season_number=1,
+                episodes=[
+                    Episode(
+                        episode_number=episode,
+                        filename=f"S01E{episode:02}.mkv",
+                        size=367001600,
+                        file_index=episode,
+                    )
+                    for episode in range(1, 11)
+                ],
+            ),
+        )
+        if precomputed:
+            set_stream_descriptors(stream)
+        streams.append(stream)
+    return streams
+
+
+def run_benchmark(count: int, rounds: int):
+    user_data = UserData(
+        streaming_provider=StreamingProvider(service="seedr", token="benchmark"),
+        selected_catalogs=["tamil_series"],
+    )
+    for name, precomputed in (("legacy", False), ("precomputed", True)):
+        elapsed = 0
+        for _ in range(rounds):
+            # Legacy streams get their descriptors set in place, so rebuild them
+            streams = get_benchmark_streams(count, precomputed)
+            start_time = time.perf_counter()
+            parse_stream_data(streams, user_data, "secret", season=1, episode=5)
+            elapsed += time.perf_counter() - start_time
+        print(f"{name:12} {elapsed / rounds / count * 1_000_000:8.2f} µs/stream")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the per stream cost of building the stream responses"
+    )
+    parser.add_argument("-n", "--streams", type=int, default=100)
+    parser.add_argument("-r", "--rounds", type=int, default=100)
+    args = parser.parse_args()
+    run_benchmark(args.streams, args.rounds)
@@ -0,0 +1,154 @@
+import argparse
+import random
+import time
+from typing import Optional
+
+from utils.search import SearchIndex
+
+
+# Titles with the spelling variations users search them with
+RELEVANCE_CORPUS = {
+    "tt9179430": ["Vikram"],
+    "tt10701074": ["Ponniyin Selvan: Part I", "Ponniyin Selvan 1"],
+    "tt15354916": ["Jailer"],
+    "tt15654328": ["Leo"],
+    "tt11947158": ["Jawan"],
+    "tt13751694": ["Maaveeran"],
+    "tt8178634": ["RRR"],
+    "tt12915716": ["Thunivu"],
+    "tt14539740": ["Varisu"],
+    "tt15097216": ["Jigarthanda DoubleX"],
+    "tt13818368": ["Mark Antony"],
+    "tt15516546": ["Kaathuvaakula Rendu Kaadhal", "Kaathu Vaakula Rendu Kaadhal"],
+    "tt12735488": ["Kaithi"],
+    "tt13927994": ["Viduthalai Part 1"],
+    "tt20850406": ["Chithha", "Chithha (Chikku)"],
+}
+RELEVANCE_QUERIES = [
+    ("vikram", "tt9179430"),
+    ("vikkram", "tt9179430"),
+    ("ponniyan selvan", "tt10701074"),
+    ("ponniyin", "tt10701074"),
+    ("ps 1 ponniyin selvan", "tt10701074"),
+    ("jailor", "tt15354916"),
+    ("jail", "tt15354916"),
+    ("leo", "tt15654328"),
+    ("jawaan", "tt11947158"),
+    ("maveeran", "tt13751694"),
+    ("maaveran", "tt13751694"),
+    ("rrr", "tt8178634"),
+    ("thunivu", "tt12915716"),
+    ("thunive", "tt12915716"),
+    ("varisu", "tt14539740"),
+    ("varasu", "tt14539740"),
+    ("jigarthanda double x", "tt15097216"),
+    ("jigar", "tt15097216"),
+    ("mark antony", "tt13818368"),
+    ("mark anthony", "tt13818368"),
+    ("kathu vakula rendu kadhal", "tt15516546"),
+    ("rendu kaadhal", "tt15516546"),
+    ("kaidhi", "tt12735488"),
+    ("viduthalai", "tt13927994"),
+    ("viduthalai part 1", "tt13927994"),
+    ("chitha", "tt20850406"),
+    ("chikku", "tt20850406"),
+    # Partially typed, as searched on every keystroke
+    ("ponni", "tt10701074"),
+    ("thuni", "tt12915716"),
+    ("vari", "tt14539740"),
+    ("maavee", "tt13751694"),
+    ("jiga", "tt15097216"),
+    ("mark anto", "tt13818368"),
+    ("kaathu vaa", "tt15516546"),
+    ("viduth", "tt13927994"),
+]
+
+
+# Real titles ranked against the corpus, sharing words & sounds with it
+DISTRACTOR_TITLES = [
+    "Vikram Vedha", "Ponmagal Vandhal", "Jai Bhim", "Leo the Lion", "Jawani Jaaneman",
+    "Maari", "Maanaadu", "Ra One", "Thuppakki", "Varisu Kaadhalan", "Jigri Dost",
+    "Mark of Zorro", "Kaadhal Kottai", "Kaithi No. 150", "Vidhi Madhi Ultaa",
+    "Chittha Kathai", "Selva Raghavan", "Ponmudi", "Jail Break", "Kadhalan",
+    "Vettaiyaadu Vilaiyaadu", "Kaakha Kaakha", "Mankatha", "Soorarai Pottru", "Asuran",
+    "Vada Chennai", "Karnan", "Master", "Beast", "Valimai", "Doctor", "Don",
+    "Annaatthe", "Etharkkum Thunindhavan",
+]
+
+
+def get_random_title(randomizer: random.Random) -> str:
+    onsets = list("bcdfgjklmnprstvy") + ["kr", "tr", "pr", "sh", "ch", "th", "dh", "bh"]
+    vowels = ["a", "aa", "e", "i", "ee", "o", "u", "ai"]
+    codas = ["", "", "n", "m", "r", "l", "nd", "nt", "ng", "s", "k"]
+    return " ".join(
+        "".join(
+            randomizer.choice(onsets) + randomizer.choice(vowels)
+            for _ in range(randomizer.randint(1, 3))
+        )
+        + randomizer.choice(codas)
+        for _ in range(randomizer.randint(1, 4))
+    )
+
+
+def run_relevance_benchmark():
+    index = SearchIndex()
+    # A first title without any searchable word used to divide by a zero length
+    assert not index.add("mf-punctuation", ["!!!"])
+    assert index.search("!!!") == []
+    for doc_id, names in RELEVANCE_CORPUS.items():
+        index.add(doc_id, names)
+    for doc_number, title in enumerate(DISTRACTOR_TITLES):
+        index.add(f"mf{doc_number}", [title])
+
+    reciprocal_ranks = []
+    for query, expected_id in RELEVANCE_QUERIES:
+        results = index.search(query, limit=10)
+        rank = results.index(expected_id) + 1 if expected_id in results else None
+        reciprocal_ranks.append(1 / rank if rank else 0)
+        if rank != 1:
+            print(f"  {query!r}: expected {expected_id} at {rank}, got {results[:3]}")
+    print(
+        f"Relevance: top-1 {reciprocal_ranks.count(1) / len(RELEVANCE_QUERIES):.0%}, "
+        f"MRR {sum(reciprocal_ranks) / len(RELEVANCE_QUERIES):.3f}"
+    )
+
+
+def run_latency_benchmark(size: int, rounds: int, seed: Optional[int]):
+    randomizer = random.Random(seed)
+    index = SearchIndex()
+    start_time = time.perf_counter()
+    for doc_id, names in RELEVANCE_CORPUS.items():
+        index.add(doc_id, names)
+    for doc_number in range(size):
+        index.add(f"mf{doc_number}", [get_random_title(randomizer)])
+    print(f"Indexed {len(index)} titles in {time.perf_counter() - start_time:.2f}s")
+
+    # Users search with the first words of the title, often partially typed
+    queries = [query for query, _ in RELEVANCE_QUERIES]
+    for _ in range(100):
+        words = get_random_title(randomizer).split()[: randomizer.randint(1, 2)]
+        words[-1] = words[-1][: randomizer.randint(3, max(3, len(words[-1])))]
+        queries.append(" ".join(words))
+    latencies = []
+    for _ in range(rounds):
+        for query in queries:
+            start_time = time.perf_counter()
+            index.search(query)
+            latencies.append((time.perf_counter() - start_time) * 1000)
+    latencies.sort()
+    print(
+        f"Latency: p50 {latencies[len(latencies) // 2]:.3f} ms, "
+        f"p99 {latencies[int(len(latencies) * 0.99)]:.3f} ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Relevance & latency benchmark of the title search index"
+    )
+    parser.add_argument("-s", "--size", type=int, default=10000)
+    parser.add_argument("-r", "--rounds", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run_relevance_benchmark()
+    run_latency_benchmark(args.size, args.rounds, args.seed)
@@ -0,0 +1,78 @@
+import argparse
+import asyncio
+import time
+
+import PTN
+
+from db import database
+from db.models import Streams
+from utils.title_parser import clear_parse_caches, parse_episode_info
+
+
+def run_benchmark(filenames: list[str], rounds: int):
+    def measure(parse_function) -> float:
+        start_time = time.perf_counter()
+        for _ in range(rounds):
+            for filename in filenames:
+                parse_function(filename)
+        return (time.perf_counter() - start_time) / (rounds * len(filenames)) * 1e6
+
+    ptn_time = measure(PTN.parse)
+
+    clear_parse_caches()
+    start_time = time.perf_counter()
+    for filename in filenames:
+        parse_episode_info(filename)
+    cold_time = (time.perf_counter() - start_time) / len(filenames) * 1e6
+    warm_time = measure(parse_episode_info)
+
+    mismatches = []
+    for filename in filenames:
+        parsed_data = PTN.parse(filename)
+        expected = (parsed_data.get("season"), parsed_data.get("episode"))
+        if parse_episode_info(filename) != expected:
+            mismatches.append((filename, expected, parse_episode_info(filename)))
+
+    print(f"Files: {len(filenames)}, rounds: {rounds}")
+    print(f"PTN.parse:                    {ptn_time:8.2f} us/file")
+    print(f"parse_episode_info (cold):    {cold_time:8.2f} us/file")
+    print(f"parse_episode_info (warm):    {warm_time:8.2f} us/file")
+    print(f"Mismatches with PTN.parse:    {len(mismatches)}")
+    for filename, expected, result in mismatches:
+        print(f"  {filename!r}: expected {expected}, got {result}")
+
+
+async def load_filenames_from_db(limit: int) -> list[str]:
+    await database.init()
+    filenames = []
+    async for stream in Streams.find().limit(limit):
+        filenames.append(stream.torrent_name)
+        if stream.filename:
+            filenames.append(stream.filename)
+        if stream.season:
+            filenames.extend(episode.filename for episode in stream.season.episodes)
+    return filenames
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the memoized title parser against PTN.parse"
+    )
+    parser.add_argument(
+        "--corpus", help="text file with one torrent filename per line", default=None
+    )
+    parser.add_argument(
+        "--from-db",
+        type=int,
+        default=1000,
+        help="number of streams to load the filenames from the DB, if no corpus file is given",
+    )
+    parser.add_argument("-r", "--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus) as corpus_file:
+            corpus = [line.strip() for line in corpus_file if line.strip()]
+    else:
+        corpus = asyncio.run(load_filenames_from_db(args.from_db))
+    run_benchmark(corpus, args.rounds)
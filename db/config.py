@@ -9,6 +9,22 @@ MONGO_URI = os.getenv("MONGO_URI")
 DATABASE_NAME = os.getenv("DATABASE_NAME")
 SECRET_KEY = os.getenv("SECRET_KEY")
 HOST_URL = os.getenv("HOST_URL")
+IMDB_MAX_CONCURRENCY = int(os.getenv("IMDB_MAX_CONCURRENCY", 4))
+IMDB_REQUESTS_PER_SECOND = float(os.getenv("IMDB_REQUESTS_PER_SECOND", 2))
+IMDB_NEGATIVE_CACHE_TTL = int(os.getenv("IMDB_NEGATIVE_CACHE_TTL", 7 * 24 * 60 * 60))
+SCRAPER_HTML_BACKEND = os.getenv("SCRAPER_HTML_BACKEND")
+SCRAPER_CACHE_DIR = os.getenv("SCRAPER_CACHE_DIR", ".scraper_cache")
+SCRAPER_MIN_INTERVAL = int(os.getenv("SCRAPER_MIN_INTERVAL", 30 * 60))
+SCRAPER_MAX_INTERVAL = int(os.getenv("SCRAPER_MAX_INTERVAL", 24 * 60 * 60))
+SCRAPER_DEFAULT_INTERVAL = int(os.getenv("SCRAPER_DEFAULT_INTERVAL", 3 * 60 * 60))
+SCRAPER_TARGET_NEW_TOPICS = float(os.getenv("SCRAPER_TARGET_NEW_TOPICS", 3))
+CATALOG_CURSOR_TTL = int(os.getenv("CATALOG_CURSOR_TTL", 10 * 60))
+SEARCH_INDEX_REBUILD_INTERVAL = int(
+    os.getenv("SEARCH_INDEX_REBUILD_INTERVAL", 60 * 60)
+)
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", 10 * 60))
+SEARCH_PREFETCH_QUERIES = int(os.getenv("SEARCH_PREFETCH_QUERIES", 50))
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv("SERVER_TIMING_SAMPLE_RATE", 0.01))
 
 class Settings():
     mongo_uri = MONGO_URI
@@ -17,6 +33,20 @@ class Settings():
     secret_key = SECRET_KEY
     host_url = HOST_URL
     logging_level = "INFO"
+    imdb_max_concurrency = IMDB_MAX_CONCURRENCY
+    imdb_requests_per_second = IMDB_REQUESTS_PER_SECOND
+    imdb_negative_cache_ttl = IMDB_NEGATIVE_CACHE_TTL
+    scraper_html_backend = SCRAPER_HTML_BACKEND
+    scraper_cache_dir = SCRAPER_CACHE_DIR
+    scraper_min_interval = SCRAPER_MIN_INTERVAL
+    scraper_max_interval = SCRAPER_MAX_INTERVAL
+    scraper_default_interval = SCRAPER_DEFAULT_INTERVAL
+    scraper_target_new_topics = SCRAPER_TARGET_NEW_TOPICS
+    catalog_cursor_ttl = CATALOG_CURSOR_TTL
+    search_index_rebuild_interval = SEARCH_INDEX_REBUILD_INTERVAL
+    search_cache_ttl = SEARCH_CACHE_TTL
+    search_prefetch_queries = SEARCH_PREFETCH_QUERIES
+    server_timing_sample_rate = SERVER_TIMING_SAMPLE_RATE
 
     # class Config:
     #     env_file = ".env"
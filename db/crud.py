@@ -2,47 +2,139 @@ import logging
 from typing import Optional
 from uuid import uuid4
 
-from beanie import WriteRules
+from beanie import Link, WriteRules
 from beanie.operators import In
+from bson import DBRef
+from pymongo import DESCENDING, UpdateOne
 
 from db import schemas
 from db.config import settings
 from db.models import (
+    CatalogEntry,
+    MediaFusionMetaData,
     MediaFusionMovieMetaData,
     MediaFusionSeriesMetaData,
     Streams,
     Season,
     Episode,
+    SeriesEpisode,
 )
-from db.schemas import Stream, MetaIdProjection
-from utils.parser import parse_stream_data, get_catalogs, search_imdb
+from db.pagination import CatalogCursorCache, get_cursor_filter
+from db.schemas import Stream
+from utils.imdb_resolver import imdb_resolver
+from utils.metrics import time_db_operation, timed_db_operation, timed_phase
+from utils.parser import parse_stream_data, get_catalogs, set_stream_descriptors
+from utils.search import SearchCache, SearchIndex
+from utils.title_parser import parse_title
 
 
+catalog_cursors = CatalogCursorCache(settings.catalog_cursor_ttl)
+CATALOG_SORT = [("last_stream_added", DESCENDING), ("meta_id", DESCENDING)]
+search_indexes = {"movie": SearchIndex(), "series": SearchIndex()}
+search_cache = SearchCache(settings.search_cache_ttl)
+SEARCH_RESULTS_LIMIT = 50
+
+
+@time_db_operation
 async def get_meta_list(
     catalog_type: str, catalog: str, skip: int = 0, limit: int = 25
 ) -> list[schemas.Meta]:
-    if catalog_type == "movie":
-        meta_class = MediaFusionMovieMetaData
-    else:
-        meta_class = MediaFusionSeriesMetaData
+    """
+    Reads the catalog page from the materialized catalog entries with keyset
+    pagination on (last_stream_added, meta_id). The skip is translated to a cursor
+    from the cached page boundaries.
+    """
+    cursor_skip, cursor = catalog_cursors.get_nearest(catalog_type, catalog, skip)
+    if cursor_skip < skip:
+        # Walk the keys up to the requested page and cache the page boundaries
+        meta_keys = (
+            await CatalogEntry.find(
+                {"catalog": catalog, "type": catalog_type},
+                get_cursor_filter(cursor, "meta_id"),
+            )
+            .sort(CATALOG_SORT)
+            .limit(skip - cursor_skip)
+            .project(schemas.CatalogCursorProjection)
+            .to_list()
+        )
+        if len(meta_keys) < skip - cursor_skip:
+            return []
+        for index in range(limit - 1, len(meta_keys), limit):
+            catalog_cursors.set(
+                catalog_type,
+                catalog,
+                cursor_skip + index + 1,
+                (meta_keys[index].last_stream_added, meta_keys[index].id),
+            )
+        cursor = (meta_keys[-1].last_stream_added, meta_keys[-1].id)
+        catalog_cursors.set(catalog_type, catalog, skip, cursor)
 
     meta_list = (
-        await meta_class.find(
-            In(meta_class.streams.catalog, [catalog]),
-            fetch_links=True,
+        # Series of a movie forum torrent share the movie catalog
+        await CatalogEntry.find(
+            {"catalog": catalog, "type": catalog_type},
+            get_cursor_filter(cursor, "meta_id"),
         )
-        .sort(-meta_class.streams.created_at)
-        .skip(skip)
+        .sort(CATALOG_SORT)
         .limit(limit)
-        .project(schemas.Meta)
+        .project(schemas.CatalogMeta)
         .to_list()
     )
+    if len(meta_list) == limit:
+        catalog_cursors.set(
+            catalog_type,
+            catalog,
+            skip + limit,
+            (meta_list[-1].last_stream_added, meta_list[-1].id),
+        )
+
+    # Not materialized, the host url is a deployment setting
     for meta in meta_list:
         meta.poster = f"{settings.host_url}/poster/{catalog_type}/{meta.id}.jpg"
 
     return meta_list
 
 
+@time_db_operation
+async def refresh_catalog_entries(meta_ids: list[str] = None):
+    """
+    Materializes the catalog entries of the given metadata from their catalogs
+    & last stream date. Without meta ids, all the catalog entries are rebuilt.
+    """
+    pipeline = [
+        {"$match": {"last_stream_added": {"$ne": None}}},
+        {"$unwind": "$catalogs"},
+        {
+            "$project": {
+                "_id": {"$concat": ["$catalogs", ":", "$_id"]},
+                "catalog": "$catalogs",
+                "meta_id": "$_id",
+                "type": 1,
+                "title": 1,
+                "background": 1,
+                "last_stream_added": 1,
+            }
+        },
+    ]
+    if meta_ids is None:
+        # $out replaces the collection at once & keeps its indexes
+        pipeline.append({"$out": CatalogEntry.get_collection_name()})
+    else:
+        pipeline.insert(0, {"$match": {"_id": {"$in": meta_ids}}})
+        pipeline.append(
+            {
+                "$merge": {
+                    "into": CatalogEntry.get_collection_name(),
+                    "on": "_id",
+                    "whenMatched": "replace",
+                    "whenNotMatched": "insert",
+                }
+            }
+        )
+    await MediaFusionMetaData.get_motor_collection().aggregate(pipeline).to_list(None)
+
+
+@time_db_operation
 async def get_movie_data_by_id(
     movie_id: str, fetch_links: bool = False
 ) -> Optional[MediaFusionMovieMetaData]:
@@ -50,6 +142,7 @@ async def get_movie_data_by_id(
     return movie_data
 
 
+@time_db_operation
 async def get_series_data_by_id(
     series_id: str, fetch_links: bool = False
 ) -> Optional[MediaFusionSeriesMetaData]:
@@ -59,28 +152,58 @@ async def get_series_data_by_id(
     return series_data
 
 
+def get_linked_stream_ids(meta_data: MediaFusionMetaData) -> list[str]:
+    return [
+        stream.ref.id if isinstance(stream, Link) else stream.id
+        for stream in meta_data.streams
+    ]
+
+
+@time_db_operation
+async def get_user_streams(
+    meta_data: MediaFusionMetaData, user_data: schemas.UserData, *filters
+) -> list[Streams]:
+    """
+    Fetches only the linked streams of the user's selected catalogs.
+    """
+    return await Streams.find(
+        In(Streams.id, get_linked_stream_ids(meta_data)),
+        In(Streams.catalog, list(user_data.selected_catalog_set)),
+        *filters,
+    ).to_list()
+
+
 async def get_movie_streams(user_data, secret_str: str, video_id: str) -> list[Stream]:
-    movie_data = await get_movie_data_by_id(video_id, True)
-    if not movie_data:
-        return []
+    with timed_phase("db"):
+        movie_data = await get_movie_data_by_id(video_id)
+        if not movie_data:
+            return []
+        streams = await get_user_streams(movie_data, user_data)
 
-    return parse_stream_data(movie_data.streams, user_data, secret_str)
+    with timed_phase("format"):
+        return parse_stream_data(streams, user_data, secret_str)
 
 
 async def get_series_streams(
     user_data, secret_str: str, video_id: str, season: int, episode: int
 ) -> list[Stream]:
-    series_data = await get_series_data_by_id(video_id, True)
-    if not series_data:
-        return []
-
-    matched_episode_streams = [
-        stream for stream in series_data.streams if stream.get_episode(season, episode)
-    ]
+    with timed_phase("db"):
+        series_data = await get_series_data_by_id(video_id)
+        if not series_data:
+            return []
+        matched_episode_streams = await get_user_streams(
+            series_data,
+            user_data,
+            {
+                "season.season_number": season,
+                "season.episodes.episode_number": episode,
+            },
+        )
 
-    return parse_stream_data(
-        matched_episode_streams, user_data, secret_str, season, episode
-    )
+    with timed_phase("format"):
+        return parse_stream_data(
+            matched_episode_streams, user_data, secret_str, season, episode
+        )
 
 
 async def get_movie_meta(meta_id: str):
@@ -101,69 +224,186 @@ async def get_movie_meta(meta_id: str):
 
 
 async def get_series_meta(meta_id: str):
-    series_data = await get_series_data_by_id(meta_id, True)
+    # Only the episode index is read, not the linked streams
+    with timed_db_operation("get_series_meta"):
+        series_data = await MediaFusionSeriesMetaData.find_one(
+            MediaFusionSeriesMetaData.id == meta_id
+        ).project(schemas.SeriesMetaProjection)
 
     if not series_data:
         return {}
 
-    metadata = {
+    episodes = series_data.episodes
+    if episodes is None:
+        # Series saved before the episode index
+        series = await get_series_data_by_id(meta_id, True)
+        episodes = build_episode_index(series.streams)
+
+    return {
         "meta": {
             "_id": meta_id,
             "type": "series",
             "title": series_data.title,
             "poster": f"{settings.host_url}/poster/series/{meta_id}.jpg",
             "background": series_data.poster,
-            "videos": [],
+            "videos": [
+                {
+                    "id": f"{meta_id}:{episode.season_number}:{episode.episode_number}",
+                    "name": f"S{episode.season_number} EP{episode.episode_number}",
+                    "season": episode.season_number,
+                    "episode": episode.episode_number,
+                    "released": episode.released,
+                }
+                for episode in episodes
+            ],
         }
     }
 
-    # Loop through streams to populate the videos list
-    for stream in series_data.streams:
-        stream: Streams
-        if stream.season:  # Ensure the stream has season data
-            for episode in stream.season.episodes:
-                metadata["meta"]["videos"].append(
-                    {
-                        "id": f"{meta_id}:{stream.season.season_number}:{episode.episode_number}",
-                        "name": f"S{stream.season.season_number} EP{episode.episode_number}",
-                        "season": stream.season.season_number,
-                        "episode": episode.episode_number,
-                        "released": stream.created_at,
-                    }
-                )
 
-    return metadata
+def build_episode_index(streams: list[Streams]) -> list[SeriesEpisode]:
+    """
+    Returns the deduplicated episodes of the streams sorted by season & episode,
+    released at the first stream of the episode.
+    """
+    released_dates = {}
+    for stream in streams:
+        if not stream.season:
+            continue
+        for episode in stream.season.episodes:
+            key = (stream.season.season_number, episode.episode_number)
+            if key not in released_dates or stream.created_at < released_dates[key]:
+                released_dates[key] = stream.created_at
+
+    return [
+        SeriesEpisode(
+            season_number=season_number,
+            episode_number=episode_number,
+            released=released,
+        )
+        for (season_number, episode_number), released in sorted(released_dates.items())
+    ]
 
 
-async def save_movie_metadata(metadata: dict):
-    # Try to get the existing movie
-    existing_movie = await MediaFusionMovieMetaData.find_one(
-        {"title": metadata["title"], "year": metadata.get("year")}
+def get_episode_index_operations(series_id: str, stream: Streams) -> list[UpdateOne]:
+    """
+    Returns the updates adding the stream episodes to the series episode index.
+    Missing episodes are pushed in sorted position and the released date of the
+    indexed episodes is lowered to the stream date when it's older. Both give the
+    same result in any order, so they can be written unordered. Legacy series
+    without the index are skipped and keep the fallback until rebuilt.
+    """
+    operations = []
+    if not stream.season:
+        return operations
+
+    season_number = stream.season.season_number
+    for episode_number in sorted(
+        {episode.episode_number for episode in stream.season.episodes}
+    ):
+        episode_filter = {
+            "season_number": season_number,
+            "episode_number": episode_number,
+        }
+        operations.append(
+            UpdateOne(
+                {
+                    "_id": series_id,
+                    "episodes": {
+                        "$type": "array",
+                        "$not": {"$elemMatch": episode_filter},
+                    },
+                },
+                {
+                    "$push": {
+                        "episodes": {
+                            "$each": [
+                                {**episode_filter, "released": stream.created_at}
+                            ],
+                            "$sort": {"season_number": 1, "episode_number": 1},
+                        }
+                    }
+                },
+            )
+        )
+        operations.append(
+            UpdateOne(
+                {"_id": series_id, "episodes": {"$type": "array"}},
+                {"$min": {"episodes.$[episode].released": stream.created_at}},
+                array_filters=[
+                    {
+                        "episode.season_number": season_number,
+                        "episode.episode_number": episode_number,
+                    }
+                ],
+            )
+        )
+    return operations
+
+
+def is_stream_linked(meta_data: MediaFusionMetaData, info_hash: str) -> bool:
+    """
+    Checks the linked stream ids of the metadata without fetching the stream documents.
+    """
+    return info_hash in get_linked_stream_ids(meta_data)
+
+
+async def add_stream_to_meta(
+    meta_data: MediaFusionMetaData, stream: Streams, aliases: list[str]
+):
+    """
+    Saves the stream and links it to the metadata with an atomic $addToSet.
+    """
+    with timed_db_operation("add_stream_to_meta"):
+        await stream.save()
+        await meta_data.update(
+            {
+                "$addToSet": {
+                    "streams": DBRef(Streams.get_collection_name(), stream.id),
+                    "catalogs": {"$each": stream.catalog},
+                    "aliases": {"$each": aliases},
+                },
+                "$max": {"last_stream_added": stream.created_at},
+            }
+        )
+    await refresh_catalog_entries([meta_data.id])
+    catalog_cursors.invalidate(stream.catalog)
+    index_meta_titles(meta_data.type, meta_data.id, [meta_data.title, *aliases])
+
+
+def index_meta_titles(meta_type: str, meta_id: str, names: list[str]):
+    """
+    Adds the metadata titles to the search index. The cached searches of the type
+    are invalidated when the title is new to the index.
+    """
+    if search_indexes[meta_type].add(meta_id, names):
+        search_cache.invalidate(meta_type)
+
+
+def get_title_aliases(metadata: dict, title: str) -> list[str]:
+    """
+    Returns the scraped title & the title of the torrent name when they are spelled
+    differently from the metadata title.
+    """
+    torrent_title = parse_title(metadata["torrent_metadata"]["torrent_name"]).get(
+        "title"
+    )
+    return sorted(
+        {
+            alias
+            for alias in (metadata["title"], torrent_title)
+            if alias and alias.casefold() != title.casefold()
+        }
     )
 
-    if not existing_movie:
-        # If the movie doesn't exist in our DB, search for IMDb ID
-        imdb_data = search_imdb(metadata["title"], metadata.get("year"))
-        meta_id = imdb_data.get("imdb_id")
-
-        if meta_id:
-            # Check if the movie with the found IMDb ID already exists in our DB
-            existing_movie = await MediaFusionMovieMetaData.get(meta_id)
-        else:
-            meta_id = f"mf{uuid4().fields[-1]}"
-        # Update the poster from IMDb if available
-        poster = imdb_data.get("poster") or metadata["poster"]
-        background = imdb_data.get("background") or metadata["poster"]
-    else:
-        poster = existing_movie.poster
-        background = existing_movie.background
-        meta_id = existing_movie.id
 
-    # Determine file index for the main movie file (largest file)
-    largest_file = max(
-        metadata["torrent_metadata"]["file_data"], key=lambda x: x["size"]
-    )
+def create_stream(metadata: dict) -> Streams:
+    """
+    Creates the stream of the scraped torrent metadata. Streams with a season hold
+    their episode files, movie streams point to the largest file of the torrent.
+    """
+    torrent_metadata = metadata["torrent_metadata"]
 
+    # Determine languages
     if "language" in metadata:
         languages = (
             [metadata["language"]]
@@ -173,14 +413,11 @@ async def save_movie_metadata(metadata: dict):
     else:
         languages = [metadata["scrap_language"]]
 
-    # Create the stream object
-    new_stream = Streams(
-        id=metadata["torrent_metadata"]["info_hash"],
-        torrent_name=metadata["torrent_metadata"]["torrent_name"],
-        announce_list=metadata["torrent_metadata"]["announce_list"],
-        size=metadata["torrent_metadata"]["total_size"],
-        filename=largest_file["filename"],
-        file_index=largest_file["index"],
+    stream = Streams(
+        id=torrent_metadata["info_hash"],
+        torrent_name=torrent_metadata["torrent_name"],
+        announce_list=torrent_metadata["announce_list"],
+        size=torrent_metadata["total_size"],
         languages=languages,
         resolution=metadata.get("resolution"),
         codec=metadata.get("codec"),
@@ -192,16 +429,72 @@ async def save_movie_metadata(metadata: dict):
         created_at=metadata["created_at"],
     )
 
+    if metadata.get("season"):
+        # Extract episodes
+        episodes = [
+            Episode(
+                episode_number=file["episode"],
+                filename=file["filename"],
+                size=file["size"],
+                file_index=file["index"],
+            )
+            for file in torrent_metadata["file_data"]
+            if file["episode"]
+        ]
+        stream.season = Season(season_number=metadata["season"], episodes=episodes)
+    else:
+        # Determine file index for the main movie file (largest file)
+        largest_file = max(torrent_metadata["file_data"], key=lambda x: x["size"])
+        stream.filename = largest_file["filename"]
+        stream.file_index = largest_file["index"]
+
+    set_stream_descriptors(stream)
+    return stream
+
+
+async def save_movie_metadata(metadata: dict) -> bool:
+    """
+    Saves the stream with its movie metadata. Returns True when a new stream was added.
+    """
+    # Try to get the existing movie
+    with timed_db_operation("find_movie_metadata"):
+        existing_movie = await MediaFusionMovieMetaData.find_one(
+            {"title": metadata["title"], "year": metadata.get("year")}
+        )
+
+    if not existing_movie:
+        # If the movie doesn't exist in our DB, search for IMDb ID
+        imdb_data = await imdb_resolver.resolve(
+            metadata["title"], metadata.get("year")
+        )
+        meta_id = imdb_data.get("imdb_id")
+
+        if meta_id:
+            # Check if the movie with the found IMDb ID already exists in our DB
+            with timed_db_operation("find_movie_metadata"):
+                existing_movie = await MediaFusionMovieMetaData.get(meta_id)
+        else:
+            meta_id = f"mf{uuid4().fields[-1]}"
+        # Update the poster from IMDb if available
+        poster = imdb_data.get("poster") or metadata["poster"]
+        background = imdb_data.get("background") or metadata["poster"]
+    else:
+        poster = existing_movie.poster
+        background = existing_movie.background
+        meta_id = existing_movie.id
+
+    new_stream = create_stream(metadata)
+
     if existing_movie:
         # Check if the stream with the same info_hash already exists
-        await existing_movie.fetch_all_links()
-        matching_stream = next(
-            (stream for stream in existing_movie.streams if stream.id == new_stream.id),
-            None,
+        if is_stream_linked(existing_movie, new_stream.id):
+            logging.info("Stream already exists for movie %s", existing_movie.title)
+            return False
+        await add_stream_to_meta(
+            existing_movie,
+            new_stream,
+            get_title_aliases(metadata, existing_movie.title),
         )
-        if not matching_stream:
-            existing_movie.streams.append(new_stream)
-        await existing_movie.save(link_rule=WriteRules.WRITE)
         logging.info("Updated movie %s", existing_movie.title)
     else:
         # If the movie doesn't exist, create a new one
@@ -212,23 +505,40 @@ async def save_movie_metadata(metadata: dict):
             poster=poster,
             background=background,
             streams=[new_stream],
+            catalogs=new_stream.catalog,
+            last_stream_added=new_stream.created_at,
+            aliases=get_title_aliases(metadata, metadata["title"]),
+        )
+        with timed_db_operation("insert_movie_metadata"):
+            await movie_data.insert(link_rule=WriteRules.WRITE)
+        await refresh_catalog_entries([movie_data.id])
+        catalog_cursors.invalidate(new_stream.catalog)
+        index_meta_titles(
+            "movie", movie_data.id, [movie_data.title, *movie_data.aliases]
         )
-        await movie_data.insert(link_rule=WriteRules.WRITE)
         logging.info("Added movie %s", movie_data.title)
+    return True
 
 
-async def save_series_metadata(metadata: dict):
+async def save_series_metadata(metadata: dict) -> bool:
+    """
+    Saves the stream with its series metadata. Returns True when a new stream was added.
+    """
     # Try to get the existing series
-    series = await MediaFusionSeriesMetaData.find_one({"title": metadata["title"]})
+    with timed_db_operation("find_series_metadata"):
+        series = await MediaFusionSeriesMetaData.find_one(
+            {"title": metadata["title"]}
+        )
 
     if not series:
         # If the series doesn't exist in our DB, search for IMDb ID
-        imdb_data = search_imdb(metadata["title"], metadata["year"])
+        imdb_data = await imdb_resolver.resolve(metadata["title"], metadata["year"])
         meta_id = imdb_data.get("imdb_id")
 
         if meta_id:
             # Check if the series with the found IMDb ID already exists in our DB
-            series = await MediaFusionSeriesMetaData.get(meta_id)
+            with timed_db_operation("find_series_metadata"):
+                series = await MediaFusionSeriesMetaData.get(meta_id)
 
         if not series:
             meta_id = meta_id or f"mf{uuid4().fields[-1]}"
@@ -243,106 +553,142 @@ async def save_series_metadata(metadata: dict):
                 poster=poster,
                 background=background,
                 streams=[],
+                episodes=[],
             )
-            await series.insert()
+            with timed_db_operation("insert_series_metadata"):
+                await series.insert()
             logging.info("Added series %s", series.title)
 
-    await series.fetch_all_links()
-    existing_stream = next(
-        (
-            s
-            for s in series.streams
-            if s.id == metadata["torrent_metadata"]["info_hash"]
-        ),
-        None,
-    )
-    if existing_stream:
+    if is_stream_linked(series, metadata["torrent_metadata"]["info_hash"]):
         # If the stream already exists, return
         logging.info("Stream already exists for series %s", series.title)
-        return
-
-    season_number = metadata["season"]
+        return False
 
-    # Extract episodes
-    episodes = [
-        Episode(
-            episode_number=file["episode"],
-            filename=file["filename"],
-            size=file["size"],
-            file_index=file["index"],
-        )
-        for file in metadata["torrent_metadata"]["file_data"]
-        if file["episode"]
-    ]
-
-    # Determine languages
-    if "language" in metadata:
-        languages = (
-            [metadata["language"]]
-            if isinstance(metadata["language"], str)
-            else metadata["language"]
-        )
-    else:
-        languages = [metadata["scrap_language"]]
+    stream = create_stream(metadata)
 
-    # Create the stream
-    stream = Streams(
-        id=metadata["torrent_metadata"]["info_hash"],
-        torrent_name=metadata["torrent_metadata"]["torrent_name"],
-        announce_list=metadata["torrent_metadata"]["announce_list"],
-        size=metadata["torrent_metadata"]["total_size"],
-        languages=languages,
-        resolution=metadata.get("resolution"),
-        codec=metadata.get("codec"),
-        quality=metadata.get("quality"),
-        audio=metadata.get("audio"),
-        encoder=metadata.get("encoder"),
-        source=metadata["source"],
-        catalog=get_catalogs(metadata["catalog"], languages),
-        created_at=metadata["created_at"],
-        season=Season(season_number=season_number, episodes=episodes),
+    # Add the stream to the series
+    await add_stream_to_meta(
+        series, stream, get_title_aliases(metadata, series.title)
+    )
+    episode_index_operations = get_episode_index_operations(series.id, stream)
+    if episode_index_operations:
+        with timed_db_operation("update_episode_index"):
+            await MediaFusionMetaData.get_motor_collection().bulk_write(
+                episode_index_operations, ordered=False
+            )
+    logging.info("Updated series %s", series.title)
+    return True
+
+
+async def rebuild_search_indexes():
+    """
+    Rebuilds the title search indexes from the metadata titles & aliases, including
+    the metadata saved by the other processes since the last build.
+    """
+    indexes = {"movie": SearchIndex(), "series": SearchIndex()}
+    async for meta in MediaFusionMetaData.find_all().project(
+        schemas.SearchIndexProjection
+    ):
+        indexes[meta.type].add(meta.id, [meta.title, *meta.aliases])
+    for index in indexes.values():
+        index.is_built = True
+    search_indexes.update(indexes)
+    search_cache.invalidate()
+    logging.info(
+        "Built the search indexes with %s movies & %s series",
+        len(indexes["movie"]),
+        len(indexes["series"]),
     )
 
-    # Add the stream to the series
-    series.streams.append(stream)
 
-    await series.save(link_rule=WriteRules.WRITE)
-    logging.info("Updated series %s", series.title)
+async def search_meta_ids(search_query: str, catalog_type: str) -> list[str]:
+    """
+    Returns the metadata ids matching the query, most relevant first.
+    """
+    search_index = search_indexes[catalog_type]
+    if search_index.is_built:
+        return search_index.search(search_query, SEARCH_RESULTS_LIMIT)
+
+    # Until the index is built, fallback to the text index sorted by relevance
+    with timed_db_operation("search_meta_ids"):
+        search_results = (
+            await MediaFusionMetaData.get_motor_collection()
+            .find(
+                {"$text": {"$search": search_query}, "type": catalog_type},
+                {"score": {"$meta": "textScore"}},
+            )
+            .sort([("score", {"$meta": "textScore"})])
+            .limit(SEARCH_RESULTS_LIMIT)
+            .to_list(None)
+        )
+    return [item["_id"] for item in search_results]
 
 
 async def process_search_query(search_query: str, catalog_type: str) -> dict:
-    if catalog_type == "movie":
-        meta_class = MediaFusionMovieMetaData
-    else:
-        meta_class = MediaFusionSeriesMetaData
-
-    search_results = (
-        await meta_class.find({"$text": {"$search": search_query}})
-        .project(MetaIdProjection)
-        .to_list()
-    )
+    search_result = search_cache.get(catalog_type, search_query)
+    if search_result is None:
+        search_result = await search_metas(search_query, catalog_type)
+    return search_result
+
+
+async def prefetch_popular_searches():
+    """
+    Searches the popular queries missing in the cache, after they expired or the
+    new titles invalidated them.
+    """
+    prefetched = 0
+    for catalog_type, query in search_cache.get_popular_queries(
+        settings.search_prefetch_queries
+    ):
+        if not search_cache.is_cached(catalog_type, query):
+            await search_metas(query, catalog_type)
+            prefetched += 1
+    if prefetched:
+        logging.info("Prefetched %s popular searches", prefetched)
+
+
+async def search_metas(search_query: str, catalog_type: str) -> dict:
+    meta_ids = await search_meta_ids(search_query, catalog_type)
 
     logging.info(
-        "Found %s results for %s in %s", len(search_results), search_query, catalog_type
+        "Found %s results for %s in %s", len(meta_ids), search_query, catalog_type
     )
 
     metas = []
 
-    for item in search_results:
+    for meta_id in meta_ids:
         # Use the appropriate function to get the meta data
         if catalog_type == "movie":
-            meta = await get_movie_meta(item.id)
+            meta = await get_movie_meta(meta_id)
         else:
-            meta = await get_series_meta(item.id)
+            meta = await get_series_meta(meta_id)
 
         if not meta:
             continue
 
         metas.append(meta["meta"])
 
-    return {"metas": metas}
+    search_result = {"metas": metas}
+    # Only the index results are the same for all the queries of a normalized key
+    if search_indexes[catalog_type].is_built:
+        search_cache.set(catalog_type, search_query, search_result)
+    return search_result
+
+
+@time_db_operation
+async def get_unknown_titles(
+    titles: list[tuple[str, Optional[int]]]
+) -> list[tuple[str, Optional[int]]]:
+    """
+    Filters out the titles which are already available in the DB.
+    """
+    known_titles = await MediaFusionMetaData.get_motor_collection().distinct(
+        "title", {"title": {"$in": [title for title, _ in titles]}}
+    )
+    return [(title, year) for title, year in titles if title not in known_titles]
 
 
+@time_db_operation
 async def get_stream_by_info_hash(info_hash: str) -> Streams:
     stream = await Streams.get(info_hash)
     return stream
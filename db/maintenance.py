@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import logging
+import time
+
+from db import crud, database
+from db.models import CatalogEntry, MediaFusionMetaData, Streams
+
+# Indexes created by older versions that no query uses anymore
+UNUSED_INDEXES = [
+    (Streams, "catalog_1_created_at_-1"),
+    (CatalogEntry, "catalog_1_last_stream_added_-1_meta_id_-1"),
+]
+
+
+async def refresh_meta_fields():
+    """
+    Recomputes the catalogs & last_stream_added fields of every metadata from its
+    linked streams. Required once for the metadata saved before these fields existed.
+    """
+    collection = MediaFusionMetaData.get_motor_collection()
+    pipeline = [
+        {
+            "$lookup": {
+                "from": Streams.get_collection_name(),
+                "localField": "streams.$id",
+                "foreignField": "_id",
+                "as": "linked_streams",
+            }
+        },
+        {
+            "$project": {
+                "catalogs": {
+                    "$reduce": {
+                        "input": "$linked_streams.catalog",
+                        "initialValue": [],
+                        "in": {"$setUnion": ["$$value", "$$this"]},
+                    }
+                },
+                "last_stream_added": {"$max": "$linked_streams.created_at"},
+            }
+        },
+        {
+            "$merge": {
+                "into": MediaFusionMetaData.get_collection_name(),
+                "on": "_id",
+                "whenMatched": "merge",
+                "whenNotMatched": "discard",
+            }
+        },
+    ]
+    start_time = time.perf_counter()
+    await collection.aggregate(pipeline).to_list(None)
+    logging.info(
+        f"Refreshed the metadata catalog fields in {time.perf_counter() - start_time:.1f}s"
+    )
+
+
+async def rebuild_episode_index():
+    """
+    Recomputes the sorted episode index of every series from its linked streams.
+    Required once for the series saved before the index existed.
+    """
+    collection = MediaFusionMetaData.get_motor_collection()
+    pipeline = [
+        {"$match": {"type": "series"}},
+        {
+            "$lookup": {
+                "from": Streams.get_collection_name(),
+                "localField": "streams.$id",
+                "foreignField": "_id",
+                "as": "linked_streams",
+            }
+        },
+        {"$unwind": "$linked_streams"},
+        {"$unwind": "$linked_streams.season.episodes"},
+        {
+            "$group": {
+                "_id": {
+                    "meta_id": "$_id",
+                    "season_number": "$linked_streams.season.season_number",
+                    "episode_number": "$linked_streams.season.episodes.episode_number",
+                },
+                "released": {"$min": "$linked_streams.created_at"},
+            }
+        },
+        {"$sort": {"_id.season_number": 1, "_id.episode_number": 1}},
+        {
+            "$group": {
+                "_id": "$_id.meta_id",
+                "episodes": {
+                    "$push": {
+                        "season_number": "$_id.season_number",
+                        "episode_number": "$_id.episode_number",
+                        "released": "$released",
+                    }
+                },
+            }
+        },
+        {
+            "$merge": {
+                "into": MediaFusionMetaData.get_collection_name(),
+                "on": "_id",
+                "whenMatched": "merge",
+                "whenNotMatched": "discard",
+            }
+        },
+    ]
+    start_time = time.perf_counter()
+    await collection.aggregate(pipeline, allowDiskUse=True).to_list(None)
+    # Series without any episode stream are left with an empty index
+    await collection.update_many(
+        {"type": "series", "episodes": None}, {"$set": {"episodes": []}}
+    )
+    logging.info(
+        f"Rebuilt the series episode index in {time.perf_counter() - start_time:.1f}s"
+    )
+
+
+async def rebuild_catalog_pages():
+    start_time = time.perf_counter()
+    await crud.refresh_catalog_entries()
+    logging.info(
+        f"Rebuilt {await CatalogEntry.count()} catalog entries "
+        f"in {time.perf_counter() - start_time:.1f}s"
+    )
+
+
+async def drop_unused_indexes():
+    for document_model, index_name in UNUSED_INDEXES:
+        collection = document_model.get_motor_collection()
+        if index_name in await collection.index_information():
+            await collection.drop_index(index_name)
+            logging.info(f"Dropped the unused index {collection.name}.{index_name}")
+
+
+async def run_command(args):
+    await database.init()
+    if args.command == "refresh-meta-fields":
+        await refresh_meta_fields()
+        await rebuild_catalog_pages()
+    elif args.command == "rebuild-episode-index":
+        await rebuild_episode_index()
+    elif args.command == "rebuild-catalog-pages":
+        await rebuild_catalog_pages()
+    elif args.command == "drop-unused-indexes":
+        await drop_unused_indexes()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="MediaFusion DB maintenance")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    subparsers.add_parser(
+        "refresh-meta-fields",
+        help="recompute the metadata catalogs & last stream date from the streams "
+        "and rebuild the catalog pages",
+    )
+    subparsers.add_parser(
+        "rebuild-episode-index",
+        help="recompute the sorted episode list of every series from the streams",
+    )
+    subparsers.add_parser(
+        "rebuild-catalog-pages",
+        help="rebuild the materialized catalog pages from the metadata",
+    )
+    subparsers.add_parser(
+        "drop-unused-indexes",
+        help="drop the indexes created by older versions that no query uses",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        format="%(levelname)s::%(asctime)s - %(message)s",
+        datefmt="%d-%b-%y %H:%M:%S",
+        level=logging.INFO,
+    )
+    asyncio.run(run_command(args))
@@ -4,7 +4,7 @@ from typing import Optional
 import pymongo
 from beanie import Document, Link
 from pydantic import BaseModel, Field
-from pymongo import IndexModel, ASCENDING
+from pymongo import IndexModel, ASCENDING, DESCENDING
 
 
 class Episode(BaseModel):
@@ -12,6 +12,7 @@ class Episode(BaseModel):
     filename: str
     size: int
     file_index: int
+    description: Optional[str] = None
 
 
 class Season(BaseModel):
@@ -38,6 +39,9 @@ class Streams(Document):
     encoder: Optional[str]
     seeders: Optional[int] = None
     cached: Optional[bool] = None
+    # Static stream descriptors, precomputed at ingest
+    description: Optional[str] = None
+    binge_group: Optional[str] = None
 
     def get_episode(self, season_number: int, episode_number: int) -> Optional[Episode]:
         """
@@ -58,6 +62,11 @@ class MediaFusionMetaData(Document):
     background: str
     streams: list[Link[Streams]]
     type: str
+    # Catalogs of the linked streams & latest stream date, source of the catalog pages
+    catalogs: list[str] = Field(default_factory=list)
+    last_stream_added: Optional[datetime] = None
+    # Other spellings of the title found at ingest, indexed for the search
+    aliases: list[str] = Field(default_factory=list)
 
     class Settings:
         is_root = True
@@ -71,5 +80,59 @@ class MediaFusionMovieMetaData(MediaFusionMetaData):
     type: str = "movie"
 
 
+class SeriesEpisode(BaseModel):
+    season_number: int
+    episode_number: int
+    released: datetime
+
+
 class MediaFusionSeriesMetaData(MediaFusionMetaData):
     type: str = "series"
+    # Deduplicated episodes of the linked streams sorted by season & episode,
+    # maintained at ingest. None for the series saved before the episode index.
+    episodes: Optional[list[SeriesEpisode]] = None
+
+
+class CatalogEntry(Document):
+    """
+    Materialized catalog listing, one entry per catalog & metadata, so a catalog page
+    is a single indexed range read. Refreshed at ingest from the metadata.
+    """
+
+    id: str
+    catalog: str
+    meta_id: str
+    type: str
+    title: str
+    background: str
+    last_stream_added: datetime
+
+    class Settings:
+        name = "catalog_pages"
+        indexes = [
+            IndexModel(
+                [
+                    ("catalog", ASCENDING),
+                    ("type", ASCENDING),
+                    ("last_stream_added", DESCENDING),
+                    ("meta_id", DESCENDING),
+                ]
+            ),
+        ]
+
+
+class IMDbLookup(Document):
+    """
+    Persistent cache of IMDb lookups keyed by the normalized title and year.
+    Negative results carry an expiry date and are removed by the TTL index.
+    """
+
+    id: str
+    imdb_id: Optional[str] = None
+    poster: Optional[str] = None
+    background: Optional[str] = None
+    created_at: datetime = Field(default_factory=datetime.now)
+    expire_at: Optional[datetime] = None
+
+    class Settings:
+        indexes = [IndexModel([("expire_at", ASCENDING)], expireAfterSeconds=0)]
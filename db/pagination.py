@@ -0,0 +1,74 @@
+import time
+from datetime import datetime
+from typing import Optional
+
+Cursor = tuple[datetime, str]
+
+
+def get_cursor_filter(cursor: Optional[Cursor], id_field: str = "_id") -> dict:
+    """
+    Returns the filter of the metadata sorted after the (last_stream_added, id) cursor.
+    """
+    if cursor is None:
+        return {}
+    last_stream_added, meta_id = cursor
+    return {
+        "$or": [
+            {"last_stream_added": {"$lt": last_stream_added}},
+            {"last_stream_added": last_stream_added, id_field: {"$lt": meta_id}},
+        ]
+    }
+
+
+class CatalogCursorCache:
+    """
+    Keeps the keyset cursors of the catalog page boundaries, so a Stremio `skip`
+    is translated to a cursor instead of skipping the documents in the DB.
+    The boundaries shift when new streams are added, so they expire after the ttl
+    and are invalidated when the catalog is updated in this process.
+    """
+
+    def __init__(self, ttl: int, max_catalogs: int = 256):
+        self.ttl = ttl
+        self.max_catalogs = max_catalogs
+        self.boundaries: dict[tuple[str, str], dict[int, Cursor]] = {}
+        self.expire_at: dict[tuple[str, str], float] = {}
+        self.metrics = {"hits": 0, "misses": 0}
+
+    def get_nearest(
+        self, catalog_type: str, catalog: str, skip: int
+    ) -> tuple[int, Optional[Cursor]]:
+        """
+        Returns the nearest cached boundary at or before the skip with its cursor.
+        """
+        if skip == 0:
+            return 0, None
+        key = (catalog_type, catalog)
+        if self.expire_at.get(key, 0) < time.monotonic():
+            self.boundaries.pop(key, None)
+            self.expire_at.pop(key, None)
+            self.metrics["misses"] += 1
+            return 0, None
+
+        boundaries = self.boundaries[key]
+        nearest_skip = max(
+            (boundary for boundary in boundaries if boundary <= skip), default=0
+        )
+        self.metrics["hits" if nearest_skip == skip else "misses"] += 1
+        return nearest_skip, boundaries.get(nearest_skip)
+
+    def set(self, catalog_type: str, catalog: str, skip: int, cursor: Cursor):
+        key = (catalog_type, catalog)
+        if key not in self.boundaries:
+            if len(self.boundaries) >= self.max_catalogs:
+                oldest_key = min(self.expire_at, key=self.expire_at.get)
+                self.boundaries.pop(oldest_key)
+                self.expire_at.pop(oldest_key)
+            self.boundaries[key] = {}
+            self.expire_at[key] = time.monotonic() + self.ttl
+        self.boundaries[key][skip] = cursor
+
+    def invalidate(self, catalogs: list[str]):
+        for key in [key for key in self.boundaries if key[1] in catalogs]:
+            self.boundaries.pop(key)
+            self.expire_at.pop(key)
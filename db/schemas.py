@@ -1,7 +1,10 @@
+from datetime import datetime
+from functools import cached_property
 from typing import Optional, Any, Literal
 
 from pydantic import BaseModel, Field
 
+from db.models import SeriesEpisode
 from utils.const import CATALOG_ID_DATA
 
 
@@ -20,6 +23,33 @@ class Meta(BaseModel):
     videos: list = None
 
 
+class CatalogMeta(Meta):
+    # Projection of the catalog entries
+    id: str = Field(alias="meta_id")
+    # Poster url built at response time
+    poster: Optional[str] = None
+    # Keyset pagination cursor, not part of the response
+    last_stream_added: Optional[datetime] = Field(default=None, exclude=True)
+
+
+class CatalogCursorProjection(BaseModel):
+    id: str = Field(alias="meta_id")
+    last_stream_added: datetime
+
+
+class SearchIndexProjection(BaseModel):
+    id: str = Field(alias="_id")
+    type: str
+    title: str
+    aliases: list[str] = Field(default_factory=list)
+
+
+class SeriesMetaProjection(BaseModel):
+    title: str
+    poster: str
+    episodes: Optional[list[SeriesEpisode]] = None
+
+
 class MetaItem(BaseModel):
     meta: Meta
 
@@ -47,14 +77,22 @@ class StreamingProvider(BaseModel):
 
     class Config:
         extra = "ignore"
+        frozen = True
 
 
 class UserData(BaseModel):
     streaming_provider: StreamingProvider = None
-    selected_catalogs: list[str] = Field(default=CATALOG_ID_DATA)
+    # A tuple, the frozen config doesn't stop a list from being mutated in place
+    selected_catalogs: tuple[str, ...] = Field(default=tuple(CATALOG_ID_DATA))
+
+    @cached_property
+    def selected_catalog_set(self) -> frozenset[str]:
+        return frozenset(self.selected_catalogs)
 
     class Config:
         extra = "ignore"
+        # Decrypted user data is cached & shared between requests
+        frozen = True
 
 
 class AuthorizeData(BaseModel):
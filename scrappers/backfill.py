@@ -0,0 +1,501 @@
+#!/usr/bin/env python3
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+from itertools import islice
+from uuid import uuid4
+
+from beanie.odm.utils.dump import get_dict
+from bson import DBRef
+from playwright.async_api import Page
+from pymongo import UpdateOne
+
+from db import database
+from db.config import settings
+from db.crud import (
+    create_stream,
+    get_episode_index_operations,
+    get_title_aliases,
+    refresh_catalog_entries,
+)
+from db.models import (
+    CatalogEntry,
+    MediaFusionMetaData,
+    MediaFusionMovieMetaData,
+    MediaFusionSeriesMetaData,
+    Streams,
+)
+from scrappers import tamil_blasters, tamilmv
+from scrappers.base import ScraperSource
+from scrappers.engine import ScraperEngine
+from scrappers.helpers import download_torrent_metadata
+from scrappers.html_parser import parse_html, HTMLNode
+from utils.imdb_resolver import imdb_resolver
+
+SOURCES = {
+    "tamil_blasters": tamil_blasters.source,
+    "tamilmv": tamilmv.source,
+}
+
+
+class BackfillCheckpoint:
+    """
+    Progress of a backfill run: the listing pages already spooled and the number
+    of spooled records already loaded into the DB.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.completed_pages: set[str] = set()
+        self.loaded_records = 0
+        try:
+            with open(path) as checkpoint_file:
+                checkpoint = json.load(checkpoint_file)
+            self.completed_pages = set(checkpoint["completed_pages"])
+            self.loaded_records = checkpoint["loaded_records"]
+        except FileNotFoundError:
+            pass
+
+    def save(self):
+        with open(self.path, "w") as checkpoint_file:
+            json.dump(
+                {
+                    "completed_pages": sorted(self.completed_pages),
+                    "loaded_records": self.loaded_records,
+                },
+                checkpoint_file,
+            )
+
+
+class BackfillEngine(ScraperEngine):
+    """
+    Scrapes listing pages in parallel and spools the parsed torrent metadata into a
+    JSONL file instead of saving each torrent, the spool is bulk loaded afterwards.
+    """
+
+    def __init__(
+        self,
+        source: ScraperSource,
+        spool_path: str,
+        checkpoint: BackfillCheckpoint,
+        page_concurrency: int = 2,
+        **kwargs,
+    ):
+        super().__init__(source, **kwargs)
+        self.spool_path = spool_path
+        self.checkpoint = checkpoint
+        self.page_semaphore = asyncio.Semaphore(page_concurrency)
+        self.spool_file = None
+
+    async def __aenter__(self):
+        await super().__aenter__()
+        self.spool_file = open(self.spool_path, "a")
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        self.spool_file.close()
+        await super().__aexit__(exc_type, exc_val, exc_tb)
+
+    async def handle_torrent(
+        self,
+        torrent_element: HTMLNode,
+        metadata: dict,
+        media_type: str,
+        page_link: str,
+        page: Page = None,
+    ) -> bool:
+        metadata = await download_torrent_metadata(
+            torrent_element,
+            metadata,
+            media_type,
+            page_link,
+            scraper=None if page else self.scraper,
+            page=page,
+        )
+        if not metadata:
+            return False
+        self.spool_file.write(json.dumps(metadata, default=datetime.isoformat) + "\n")
+        return True
+
+    async def scrap_page(self, url: str, language: str, media_type: str):
+        if url in self.checkpoint.completed_pages:
+            logging.info(f"Skipping already spooled page {url}")
+            return
+
+        async with self.page_semaphore:
+            self.metrics["listing_pages"] += 1
+            if self.scrap_with_playwright:
+                async with self.browser_pool.page() as page:
+                    page_content = await self.fetch(url, page)
+            else:
+                page_content = await self.fetch(url)
+
+            listing = parse_html(page_content, parse_only=("li", "data-rowid"))
+            movies = listing.select(self.source.listing_selector)
+            # IMDb data is resolved in bulk while loading the spool
+            await asyncio.gather(
+                *[
+                    self.process_topic_with_fetcher(
+                        movie, language=language, media_type=media_type
+                    )
+                    for movie in movies
+                ]
+            )
+
+        self.spool_file.flush()
+        self.checkpoint.completed_pages.add(url)
+        self.checkpoint.save()
+        logging.info(f"Spooled page {url}")
+
+    async def run_backfill(
+        self, forums: list[tuple[str, str]], start_page: int, end_page: int
+    ):
+        await asyncio.gather(
+            *[
+                self.scrap_page(
+                    self.source.get_forum_url(forum_id, page_number),
+                    language,
+                    video_type,
+                )
+                for language, video_type in forums
+                for forum_id in self.source.get_forum_ids(language, video_type)
+                for page_number in range(start_page, end_page + 1)
+            ]
+        )
+
+
+def read_spool(spool_path: str, skip: int):
+    with open(spool_path) as spool_file:
+        for line in islice(spool_file, skip, None):
+            metadata = json.loads(line)
+            if metadata.get("created_at"):
+                metadata["created_at"] = datetime.fromisoformat(metadata["created_at"])
+            yield metadata
+
+
+async def load_batch(batch: list[dict]) -> tuple[int, int, int]:
+    """
+    Bulk upserts a batch of spooled records and returns the number of streams,
+    metadata and skipped invalid records. Streams are only inserted when missing
+    and are added to their metadata with $addToSet, so reloading a batch is a no-op.
+    """
+    streams: dict[str, Streams] = {}
+    meta_records: dict[tuple, dict] = {}
+    meta_streams: dict[tuple, list[str]] = {}
+    meta_aliases: dict[tuple, set[str]] = {}
+    skipped_records = 0
+    for metadata in batch:
+        try:
+            stream = create_stream(metadata)
+            # Same lookup keys as save_movie_metadata & save_series_metadata
+            if metadata.get("season"):
+                meta_key = ("series", metadata["title"], None)
+            else:
+                meta_key = ("movie", metadata["title"], metadata["year"])
+            aliases = get_title_aliases(metadata, metadata["title"])
+        except Exception as e:
+            skipped_records += 1
+            logging.error(
+                f"Skipping invalid spooled record "
+                f"{metadata.get('torrent_metadata', {}).get('info_hash')}: {e}",
+                exc_info=True,
+            )
+            continue
+        streams[stream.id] = stream
+        meta_records.setdefault(meta_key, metadata)
+        meta_streams.setdefault(meta_key, []).append(stream.id)
+        meta_aliases.setdefault(meta_key, set()).update(aliases)
+
+    if not streams:
+        return 0, 0, skipped_records
+
+    # Find the existing metadata of the batch titles with a single query
+    existing_meta_ids = {}
+    async for meta in MediaFusionMetaData.get_motor_collection().find(
+        {"title": {"$in": list({title for _, title, _ in meta_records})}},
+        {"title": 1, "year": 1, "type": 1},
+    ):
+        if meta["type"] == "series":
+            existing_meta_ids[("series", meta["title"], None)] = meta["_id"]
+        else:
+            existing_meta_ids[("movie", meta["title"], meta.get("year"))] = meta["_id"]
+
+    new_meta_keys = [key for key in meta_records if key not in existing_meta_ids]
+    imdb_results = dict(
+        zip(
+            new_meta_keys,
+            await imdb_resolver.resolve_many(
+                [
+                    (meta_records[key]["title"], meta_records[key]["year"])
+                    for key in new_meta_keys
+                ]
+            ),
+        )
+    )
+
+    meta_updates: dict[str, dict] = {}
+    for meta_key, metadata in meta_records.items():
+        meta_id = existing_meta_ids.get(meta_key)
+        insert_fields = {}
+        if meta_id is None:
+            imdb_data = imdb_results[meta_key]
+            meta_id = imdb_data.get("imdb_id") or f"mf{uuid4().fields[-1]}"
+            meta_class = (
+                MediaFusionSeriesMetaData
+                if meta_key[0] == "series"
+                else MediaFusionMovieMetaData
+            )
+            meta = meta_class(
+                id=meta_id,
+                title=metadata["title"],
+                year=metadata["year"],
+                poster=imdb_data.get("poster") or metadata["poster"],
+                background=imdb_data.get("background") or metadata["poster"],
+                streams=[],
+            )
+            if meta_key[0] == "series":
+                meta.episodes = []
+            # Encoded by beanie to keep the inheritance class id of the documents
+            insert_fields = get_dict(meta, to_db=True)
+            # Fields updated with every batch can't be set on insert as well
+            for field in ("_id", "streams", "catalogs", "last_stream_added", "aliases"):
+                insert_fields.pop(field)
+
+        meta_update = meta_updates.setdefault(
+            meta_id,
+            {
+                "insert_fields": insert_fields,
+                "stream_ids": [],
+                "aliases": set(),
+                "is_series": meta_key[0] == "series",
+            },
+        )
+        meta_update["stream_ids"].extend(meta_streams[meta_key])
+        meta_update["aliases"].update(meta_aliases[meta_key])
+
+    stream_operations = []
+    for stream in streams.values():
+        stream_data = get_dict(stream, to_db=True)
+        stream_data.pop("_id")
+        stream_operations.append(
+            UpdateOne({"_id": stream.id}, {"$setOnInsert": stream_data}, upsert=True)
+        )
+
+    stream_collection = Streams.get_collection_name()
+    meta_operations = []
+    episode_operations = []
+    for meta_id, meta_update in meta_updates.items():
+        stream_ids = list(dict.fromkeys(meta_update["stream_ids"]))
+        update = {
+            "$addToSet": {
+                "streams": {
+                    "$each": [
+                        DBRef(stream_collection, stream_id) for stream_id in stream_ids
+                    ]
+                },
+                "catalogs": {
+                    "$each": list(
+                        {
+                            catalog
+                            for stream_id in stream_ids
+                            for catalog in streams[stream_id].catalog
+                        }
+                    )
+                },
+                "aliases": {"$each": sorted(meta_update["aliases"])},
+            },
+            "$max": {
+                "last_stream_added": max(
+                    streams[stream_id].created_at for stream_id in stream_ids
+                )
+            },
+        }
+        if meta_update["insert_fields"]:
+            update["$setOnInsert"] = meta_update["insert_fields"]
+        meta_operations.append(UpdateOne({"_id": meta_id}, update, upsert=True))
+        if meta_update["is_series"]:
+            for stream_id in stream_ids:
+                episode_operations.extend(
+                    get_episode_index_operations(meta_id, streams[stream_id])
+                )
+
+    await Streams.get_motor_collection().bulk_write(stream_operations, ordered=False)
+    await MediaFusionMetaData.get_motor_collection().bulk_write(
+        meta_operations, ordered=False
+    )
+    if episode_operations:
+        await MediaFusionMetaData.get_motor_collection().bulk_write(
+            episode_operations, ordered=False
+        )
+    await refresh_catalog_entries(list(meta_updates))
+    return len(stream_operations), len(meta_operations), skipped_records
+
+
+async def load_spool(
+    spool_path: str,
+    checkpoint: BackfillCheckpoint,
+    batch_size: int,
+    defer_indexes: bool,
+):
+    await database.init()
+    collections = [
+        MediaFusionMetaData.get_motor_collection(),
+        Streams.get_motor_collection(),
+        CatalogEntry.get_motor_collection(),
+    ]
+    if defer_indexes:
+        # Only meant for rebuilding a database, the indexes are rebuilt once at the end
+        logging.info("Dropping the indexes until the spool is loaded")
+        for collection in collections:
+            await collection.drop_indexes()
+
+    start_time = time.perf_counter()
+    records = read_spool(spool_path, checkpoint.loaded_records)
+    total_skipped_records = 0
+    while batch := list(islice(records, batch_size)):
+        streams_count, meta_count, skipped_records = await load_batch(batch)
+        total_skipped_records += skipped_records
+        checkpoint.loaded_records += len(batch)
+        checkpoint.save()
+        logging.info(
+            f"Loaded {checkpoint.loaded_records} records: "
+            f"{streams_count} streams into {meta_count} metadata, "
+            f"{skipped_records} invalid records skipped"
+        )
+
+    if defer_indexes:
+        logging.info("Rebuilding the indexes")
+        # init_beanie creates the missing indexes of the document models
+        await database.init()
+    logging.info(
+        f"Spool loaded in {time.perf_counter() - start_time:.1f}s, "
+        f"{total_skipped_records} invalid records skipped"
+    )
+
+
+async def run_backfill(
+    source: ScraperSource,
+    forums: list[tuple[str, str]],
+    start_page: int,
+    end_page: int,
+    spool_path: str,
+    batch_size: int = 5000,
+    page_concurrency: int = 2,
+    defer_indexes: bool = False,
+    skip_scrape: bool = False,
+    skip_load: bool = False,
+    scrap_with_playwright: bool = None,
+    proxy_url: str = None,
+    headless: bool = False,
+):
+    os.makedirs(os.path.dirname(spool_path) or ".", exist_ok=True)
+    checkpoint = BackfillCheckpoint(f"{spool_path}.checkpoint.json")
+
+    if not skip_scrape:
+        async with BackfillEngine(
+            source,
+            spool_path,
+            checkpoint,
+            page_concurrency,
+            proxy_url=proxy_url,
+            scrap_with_playwright=scrap_with_playwright,
+            headless=headless,
+        ) as engine:
+            await engine.run_backfill(forums, start_page, end_page)
+
+    if not skip_load:
+        await load_spool(spool_path, checkpoint, batch_size, defer_indexes)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Backfill a page range of a source into the DB. The parsed torrents "
+        "are spooled into a JSONL file and bulk loaded, an interrupted run resumes "
+        "from its checkpoint when restarted with the same spool."
+    )
+    parser.add_argument("source", choices=list(SOURCES))
+    parser.add_argument(
+        "-l", "--language", help="backfill only this language", default=None
+    )
+    parser.add_argument(
+        "-t", "--video-type", help="backfill only this video type", default=None
+    )
+    parser.add_argument("-s", "--start-page", type=int, default=1)
+    parser.add_argument("-e", "--end-page", type=int, required=True)
+    parser.add_argument(
+        "--spool",
+        help="spool file path. default: <scraper cache dir>/backfill/<source>.jsonl",
+        default=None,
+    )
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument(
+        "--page-concurrency",
+        type=int,
+        default=2,
+        help="number of listing pages scraped in parallel",
+    )
+    parser.add_argument(
+        "--defer-indexes",
+        action="store_true",
+        help="drop the indexes while loading & rebuild them at the end. "
+        "Only use it to rebuild a database.",
+    )
+    parser.add_argument(
+        "--skip-scrape", action="store_true", help="only load the existing spool"
+    )
+    parser.add_argument(
+        "--skip-load", action="store_true", help="only scrape into the spool"
+    )
+    parser.add_argument(
+        "--scrap-with-playwright", action="store_true", help="scrap with playwright"
+    )
+    parser.add_argument(
+        "--proxy-url",
+        help="proxy url to scrap. ex: socks5://127.0.0.1:1080",
+        default=None,
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run playwright browser in headless mode. ex: on servers",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        format="%(levelname)s::%(asctime)s - %(message)s",
+        datefmt="%d-%b-%y %H:%M:%S",
+        level=logging.INFO,
+    )
+
+    backfill_source = SOURCES[args.source]
+    backfill_forums = [
+        (language, video_type)
+        for language in backfill_source.forum_links
+        for video_type in backfill_source.forum_links[language]
+        if args.language in (None, language) and args.video_type in (None, video_type)
+    ]
+    asyncio.run(
+        run_backfill(
+            backfill_source,
+            backfill_forums,
+            args.start_page,
+            args.end_page,
+            args.spool
+            or os.path.join(
+                settings.scraper_cache_dir, "backfill", f"{args.source}.jsonl"
+            ),
+            batch_size=args.batch_size,
+            page_concurrency=args.page_concurrency,
+            defer_indexes=args.defer_indexes,
+            skip_scrape=args.skip_scrape,
+            skip_load=args.skip_load,
+            scrap_with_playwright=args.scrap_with_playwright,
+            proxy_url=args.proxy_url,
+            headless=args.headless,
+        )
+    )
@@ -0,0 +1,65 @@
+from typing import Union
+from urllib.parse import quote_plus
+
+
+class ScraperSource:
+    """
+    Declarative description of an IPS forum source. A source only declares its
+    forum map, selectors and fetch strategy, the ScraperEngine runs the pipeline.
+    """
+
+    # Name of the source, stored as the stream source. ex: "TamilBlasters"
+    name: str
+    homepage: str
+    # language -> video type -> forum id or list of forum ids
+    forum_links: dict[str, dict[str, Union[str, list[str]]]]
+
+    # Selectors
+    listing_selector = "li[data-rowid]"
+    search_results_selector = "div[data-role='resultsArea']"
+    search_result_selector = "li[data-role='activityItem']"
+    search_result_link_selector = "a[data-linktype='link']"
+    poster_selector = "div[data-commenttype='forums'] img"
+    poster_attribute = "src"
+    created_at_selector = "time"
+    torrent_selector = "a[data-fileext='torrent']"
+
+    # Fetch strategy
+    search_with_playwright = False
+    requests_per_second = 2
+    requests_burst = 5
+    search_pages_per_second = 1
+    search_pages_burst = 3
+    max_concurrency = 4
+    results_per_search_page = 25
+
+    @property
+    def video_types(self) -> list[str]:
+        return sorted(
+            {
+                video_type
+                for video_types in self.forum_links.values()
+                for video_type in video_types
+            }
+        )
+
+    def get_forum_ids(self, language: str, video_type: str) -> list[str]:
+        forum_ids = self.forum_links[language][video_type]
+        return forum_ids if isinstance(forum_ids, list) else [forum_ids]
+
+    def get_forum_url(self, forum_id: str, page_number: int) -> str:
+        return f"{self.homepage}/index.php?/forums/forum/{forum_id}/page/{page_number}/"
+
+    def get_supported_forums(self) -> dict[str, dict[str, str]]:
+        return {
+            forum_id: {"language": language, "media_type": video_type}
+            for language in self.forum_links
+            for video_type in self.forum_links[language]
+            for forum_id in self.get_forum_ids(language, video_type)
+        }
+
+    def get_search_url(self, keyword: str, page_number: int = 1) -> str:
+        return (
+            f"{self.homepage}/index.php?/search/&q={quote_plus(keyword)}&type=forums_topic"
+            f"&page={page_number}&search_and_or=or&search_in=titles&sortby=relevancy"
+        )
@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright, Page
+from playwright_stealth import stealth_async
+
+
+class BrowserPool:
+    """
+    Keeps one browser and context alive for the whole scrape run, so the cloudflare
+    clearance cookies are shared by every page. Pages are reused and at most
+    `max_pages` of them are open in parallel.
+    """
+
+    def __init__(
+        self, proxy_url: str = None, headless: bool = False, max_pages: int = 4
+    ):
+        self.proxy_url = proxy_url
+        self.headless = headless
+        self.max_pages = max_pages
+        self.playwright = None
+        self.browser = None
+        self.context = None
+        self._idle_pages: list[Page] = []
+        self._semaphore = asyncio.Semaphore(max_pages)
+        self._start_lock = asyncio.Lock()
+        self.metrics = {
+            "launch_time": 0.0,
+            "pages_opened": 0,
+            "page_uses": 0,
+            "page_use_time": 0.0,
+            "page_wait_time": 0.0,
+        }
+
+    async def start(self):
+        async with self._start_lock:
+            if self.browser:
+                return
+            start_time = time.perf_counter()
+            self.playwright = await async_playwright().start()
+            self.browser = await self.playwright.firefox.launch(
+                headless=self.headless,
+                proxy={"server": self.proxy_url} if self.proxy_url else None,
+            )
+            self.context = await self.browser.new_context()
+            self.metrics["launch_time"] = time.perf_counter() - start_time
+            logging.info(f"Browser launched in {self.metrics['launch_time']:.2f}s")
+
+    async def close(self):
+        if not self.browser:
+            return
+        await self.context.close()
+        await self.browser.close()
+        await self.playwright.stop()
+        self.browser = self.context = self.playwright = None
+        self._idle_pages.clear()
+        self.log_metrics()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    @asynccontextmanager
+    async def page(self):
+        """
+        Acquires a page from the pool, waiting while `max_pages` pages are in use.
+        """
+        await self.start()
+        wait_start_time = time.perf_counter()
+        async with self._semaphore:
+            self.metrics["page_wait_time"] += time.perf_counter() - wait_start_time
+            if self._idle_pages:
+                page = self._idle_pages.pop()
+            else:
+                page = await self.context.new_page()
+                await stealth_async(page)
+                self.metrics["pages_opened"] += 1
+
+            use_start_time = time.perf_counter()
+            try:
+                yield page
+            finally:
+                use_time = time.perf_counter() - use_start_time
+                self.metrics["page_uses"] += 1
+                self.metrics["page_use_time"] += use_time
+                logging.debug(f"Page used for {use_time:.2f}s")
+                if not page.is_closed():
+                    self._idle_pages.append(page)
+
+    def log_metrics(self):
+        page_uses = self.metrics["page_uses"] or 1
+        logging.info(
+            "Browser pool: launched once in %.2fs, %s pages opened for %s page uses, "
+            "avg %.2fs per page use, %.2fs waited for a free page",
+            self.metrics["launch_time"],
+            self.metrics["pages_opened"],
+            self.metrics["page_uses"],
+            self.metrics["page_use_time"] / page_uses,
+            self.metrics["page_wait_time"],
+        )
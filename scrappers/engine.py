@@ -0,0 +1,463 @@
+import argparse
+import asyncio
+import logging
+import math
+import re
+import time
+from contextlib import AsyncExitStack
+from typing import Optional
+
+from dateutil.parser import parse as dateparser
+from playwright.async_api import Page
+
+from db import database
+from scrappers.base import ScraperSource
+from scrappers.browser_pool import BrowserPool
+from scrappers.helpers import (
+    get_page_content,
+    download_and_save_torrent,
+    prefetch_imdb_data,
+    process_paginated_results,
+    RateLimiter,
+)
+from scrappers.html_parser import parse_html, HTMLNode
+from scrappers.hybrid_session import HybridSession
+from scrappers.torrent_store import torrent_store
+
+
+class ScraperEngine:
+    """
+    Runs the scrape pipeline for a ScraperSource: a shared browser pool & session,
+    rate limited and concurrent topic processing, topic dedup and run metrics.
+    """
+
+    def __init__(
+        self,
+        source: ScraperSource,
+        proxy_url: str = None,
+        scrap_with_playwright: bool = False,
+        headless: bool = False,
+    ):
+        self.source = source
+        self.proxy_url = proxy_url
+        self.scrap_with_playwright = scrap_with_playwright is True
+        self.headless = headless
+        self.browser_pool: Optional[BrowserPool] = None
+        self.scraper: Optional[HybridSession] = None
+        self.rate_limiter = RateLimiter(
+            source.requests_per_second, capacity=source.requests_burst
+        )
+        self.search_rate_limiter = RateLimiter(
+            source.search_pages_per_second, capacity=source.search_pages_burst
+        )
+        self.topic_semaphore = asyncio.Semaphore(source.max_concurrency)
+        self.seen_topics: set[str] = set()
+        self.metrics = {
+            "listing_pages": 0,
+            "unchanged_pages": 0,
+            "topics": 0,
+            "duplicate_topics": 0,
+            "new_topics": 0,
+            "new_streams": 0,
+            "skipped_torrents": 0,
+            "errors": 0,
+        }
+        self._exit_stack = AsyncExitStack()
+        self._start_time = None
+
+    async def __aenter__(self):
+        await database.init()
+        self._start_time = time.perf_counter()
+        if self.scrap_with_playwright or self.source.search_with_playwright:
+            # Not entered, the browser is only launched by the first page request,
+            # so forum runs of a source searching with playwright never start it
+            self.browser_pool = BrowserPool(
+                self.proxy_url, self.headless, max_pages=self.source.max_concurrency
+            )
+            self._exit_stack.push_async_callback(self.browser_pool.close)
+        self.scraper = await self._exit_stack.enter_async_context(
+            HybridSession(
+                self.proxy_url,
+                self.browser_pool,
+                pool_maxsize=self.source.max_concurrency,
+            )
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self._exit_stack.aclose()
+        self.log_metrics()
+
+    def log_metrics(self):
+        logging.info(
+            "%s scrap finished in %.1fs: %s",
+            self.source.name,
+            time.perf_counter() - self._start_time,
+            ", ".join(f"{key}={value}" for key, value in self.metrics.items()),
+        )
+        logging.info(
+            "Torrent store: %s hits, %s downloads",
+            torrent_store.metrics["hits"],
+            torrent_store.metrics["misses"],
+        )
+
+    async def fetch(self, url: str, page: Page = None):
+        async with self.rate_limiter:
+            if page:
+                return await get_page_content(page, url)
+            response = await self.scraper.get(url)
+        response.raise_for_status()
+        return response.content
+
+    async def process_topic(
+        self,
+        movie: HTMLNode,
+        language: str = None,
+        media_type: str = None,
+        page: Page = None,
+        is_search_result: bool = False,
+    ) -> int:
+        """
+        Processes the topic torrents and returns the number of new streams added.
+        """
+        if is_search_result:
+            movie_link = movie.select_one(self.source.search_result_link_selector)
+            forum_link = movie.select_one("a[href*='forums/forum/']").get("href")
+            forum_id = re.search(r"forums/forum/([^/]+)/", forum_link)[1]
+            supported_forums = self.source.get_supported_forums()
+            if forum_id not in supported_forums:
+                logging.error(f"Unsupported forum {forum_id}")
+                return 0
+            # Extracting language and media_type from supported_forums
+            language = supported_forums[forum_id]["language"]
+            media_type = supported_forums[forum_id]["media_type"]
+        else:
+            movie_link = movie.select_one("a")
+
+        if not movie_link:
+            logging.error(
+                f"Movie link not found in the {self.source.name} "
+                f"{'search result' if is_search_result else 'listing'} row "
+                f"{movie.get('data-rowid')}: {movie.text.strip()[:100]!r}"
+            )
+            return 0
+
+        page_link = movie_link.get("href")
+        if page_link in self.seen_topics:
+            self.metrics["duplicate_topics"] += 1
+            return 0
+        self.seen_topics.add(page_link)
+        self.metrics["topics"] += 1
+
+        try:
+            movie_page = parse_html(await self.fetch(page_link, page))
+
+            # Extracting other details
+            poster_element = movie_page.select_one(self.source.poster_selector)
+            poster = (
+                poster_element.get(self.source.poster_attribute)
+                if poster_element
+                else None
+            )
+
+            datetime_element = movie_page.select_one(self.source.created_at_selector)
+            created_at = (
+                dateparser(datetime_element.get("datetime"))
+                if datetime_element
+                else None
+            )
+
+            # Define metadata
+            metadata = {
+                "catalog": f"{language}_{media_type}",
+                "poster": poster,
+                "created_at": created_at,
+                "scrap_language": language.title(),
+                "source": self.source.name,
+            }
+
+            # Extracting torrent details
+            torrent_elements = movie_page.select(self.source.torrent_selector)
+
+            if not torrent_elements:
+                logging.error(f"No torrents found for {page_link}")
+                return 0
+
+            new_streams = 0
+            for torrent_element in torrent_elements:
+                try:
+                    is_new_stream = await self.handle_torrent(
+                        torrent_element, metadata.copy(), media_type, page_link, page
+                    )
+                except Exception as e:
+                    is_new_stream = False
+                    logging.error(
+                        f"Error processing torrent {page_link}: {e}",
+                        exc_info=True,
+                        stack_info=True,
+                    )
+                if is_new_stream:
+                    new_streams += 1
+                else:
+                    self.metrics["skipped_torrents"] += 1
+
+            self.metrics["new_streams"] += new_streams
+            self.metrics["new_topics"] += new_streams > 0
+            return new_streams
+        except Exception as e:
+            self.metrics["errors"] += 1
+            logging.error(
+                f"Error processing movie {page_link}: {e}",
+                exc_info=True,
+                stack_info=True,
+            )
+            return 0
+
+    async def handle_torrent(
+        self,
+        torrent_element: HTMLNode,
+        metadata: dict,
+        media_type: str,
+        page_link: str,
+        page: Page = None,
+    ) -> bool:
+        return await download_and_save_torrent(
+            torrent_element,
+            scraper=None if page else self.scraper,
+            page=page,
+            metadata=metadata,
+            media_type=media_type,
+            page_link=page_link,
+        )
+
+    async def process_topic_with_fetcher(self, movie: HTMLNode, **kwargs) -> int:
+        if self.scrap_with_playwright or (
+            kwargs.get("is_search_result") and self.source.search_with_playwright
+        ):
+            async with self.browser_pool.page() as page:
+                return await self.process_topic(movie, page=page, **kwargs)
+        async with self.topic_semaphore:
+            return await self.process_topic(movie, **kwargs)
+
+    async def process_topics(self, movies: list[HTMLNode], **kwargs):
+        await prefetch_imdb_data(
+            [
+                movie.select_one("a").text.strip()
+                for movie in movies
+                if movie.select_one("a")
+            ]
+        )
+        await asyncio.gather(
+            *[self.process_topic_with_fetcher(movie, **kwargs) for movie in movies]
+        )
+
+    async def scrap_page(self, url: str, language: str, media_type: str):
+        self.metrics["listing_pages"] += 1
+        response = None
+        # Listing pages share the forum request rate with the topic pages
+        if self.scrap_with_playwright:
+            async with self.browser_pool.page() as page, self.rate_limiter:
+                page_content = await get_page_content(page, url)
+        else:
+            async with self.rate_limiter:
+                response = await self.scraper.get_if_modified(url)
+            if response is None:
+                self.metrics["unchanged_pages"] += 1
+                logging.info(f"No changes in {url} since the last run")
+                return
+            response.raise_for_status()
+            page_content = response.content
+
+        listing = parse_html(page_content, parse_only=("li", "data-rowid"))
+        movies = listing.select(self.source.listing_selector)
+        await self.process_topics(movies, language=language, media_type=media_type)
+
+        if response is not None:
+            self.scraper.mark_processed(url, response)
+
+    async def get_search_results(self, keyword: str, page_number: int = 1):
+        search_link = self.source.get_search_url(keyword, page_number)
+        if self.source.search_with_playwright:
+            async with self.browser_pool.page() as page:
+                page_content = await get_page_content(page, search_link)
+        else:
+            response = await self.scraper.get(search_link)
+            response.raise_for_status()
+            page_content = response.content
+        return parse_html(page_content)
+
+    async def scrap_search_keyword(self, keyword: str):
+        async with self.search_rate_limiter:
+            soup = await self.get_search_results(keyword)
+        results_element = soup.select_one(self.source.search_results_selector)
+
+        results_count = int(
+            re.search(r"\d+", results_element.select_one("p").text).group()
+        )
+        logging.info(f"Found {results_count} results for {keyword}")
+
+        movies = results_element.select(self.source.search_result_selector)
+        number_of_pages = math.ceil(results_count / self.source.results_per_search_page)
+        logging.info(f"Found {number_of_pages} pages for {keyword}")
+
+        async def fetch_page(page_number):
+            page_soup = await self.get_search_results(keyword, page_number)
+            return page_soup.select(self.source.search_result_selector)
+
+        async def process_result(movie):
+            await self.process_topic_with_fetcher(movie, is_search_result=True)
+
+        await process_paginated_results(
+            movies,
+            number_of_pages,
+            fetch_page,
+            process_result,
+            self.search_rate_limiter,
+            max_workers=self.source.max_concurrency,
+        )
+
+    async def run_scraper(
+        self, language: str, video_type: str, pages: int, start_page: int
+    ) -> dict:
+        """
+        Scraps the forum pages of the catalog and returns its yield stats.
+        """
+        metrics = self.metrics.copy()
+        try:
+            forum_ids = self.source.get_forum_ids(language, video_type)
+        except KeyError:
+            logging.error(
+                f"Unsupported language or video type: {language}_{video_type}"
+            )
+            return {}
+
+        for forum_id in forum_ids:
+            for page_number in range(start_page, pages + start_page):
+                scrap_link = self.source.get_forum_url(forum_id, page_number)
+                logging.info(f"Scrap page: {scrap_link}")
+                await self.scrap_page(scrap_link, language, video_type)
+
+        logging.info(f"Scrap completed for : {language}_{video_type}")
+        return {
+            key: self.metrics[key] - metrics[key]
+            for key in ("listing_pages", "topics", "new_topics", "new_streams")
+        }
+
+    async def run_schedule_scrape(self, pages: int, start_page: int):
+        for language in self.source.forum_links:
+            for video_type in self.source.forum_links[language]:
+                await self.run_scraper(language, video_type, pages, start_page)
+
+
+async def run_scraper(
+    source: ScraperSource,
+    language: str = None,
+    video_type: str = None,
+    pages: int = None,
+    start_page: int = None,
+    search_keyword: str = None,
+    scrap_with_playwright: bool = None,
+    proxy_url: str = None,
+    headless: bool = False,
+) -> Optional[dict]:
+    async with ScraperEngine(
+        source, proxy_url, scrap_with_playwright, headless
+    ) as engine:
+        if search_keyword:
+            await engine.scrap_search_keyword(search_keyword)
+            return None
+        return await engine.run_scraper(language, video_type, pages, start_page)
+
+
+async def run_schedule_scrape(
+    source: ScraperSource,
+    pages: int = 1,
+    start_page: int = 1,
+    scrap_with_playwright: bool = None,
+    proxy_url: str = None,
+    headless: bool = False,
+):
+    async with ScraperEngine(
+        source, proxy_url, scrap_with_playwright, headless
+    ) as engine:
+        await engine.run_schedule_scrape(pages, start_page)
+
+
+def run_cli(source: ScraperSource):
+    parser = argparse.ArgumentParser(
+        description=f"Scrap Movie metadata from {source.name}"
+    )
+    parser.add_argument(
+        "--all", action="store_true", help="scrap all type of movies & series"
+    )
+    parser.add_argument(
+        "-l",
+        "--language",
+        help="scrap movie language",
+        default="tamil",
+        choices=list(source.forum_links),
+    )
+    parser.add_argument(
+        "-t",
+        "--video-type",
+        help="scrap movie video type",
+        default="hdrip",
+        choices=source.video_types,
+    )
+    parser.add_argument(
+        "-p", "--pages", type=int, default=1, help="number of scrap pages"
+    )
+    parser.add_argument(
+        "-s", "--start-pages", type=int, default=1, help="page number to start scrap."
+    )
+    parser.add_argument(
+        "-k",
+        "--search-keyword",
+        help="search keyword to scrap movies & series. ex: 'bigg boss'",
+        default=None,
+    )
+    parser.add_argument(
+        "--scrap-with-playwright", action="store_true", help="scrap with playwright"
+    )
+    parser.add_argument(
+        "--proxy-url",
+        help="proxy url to scrap. ex: socks5://127.0.0.1:1080",
+        default=None,
+    )
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="run playwright browser in headless mode. ex: on servers",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        format="%(levelname)s::%(asctime)s - %(message)s",
+        datefmt="%d-%b-%y %H:%M:%S",
+        level=logging.INFO,
+    )
+    if args.all:
+        asyncio.run(
+            run_schedule_scrape(
+                source,
+                args.pages,
+                args.start_pages,
+                args.scrap_with_playwright,
+                args.proxy_url,
+                args.headless,
+            )
+        )
+    else:
+        asyncio.run(
+            run_scraper(
+                source,
+                args.language,
+                args.video_type,
+                args.pages,
+                args.start_pages,
+                args.search_keyword,
+                args.scrap_with_playwright,
+                args.proxy_url,
+                args.headless,
+            )
+        )
@@ -1,25 +1,30 @@
+import asyncio
 import logging
+import time
+from typing import Awaitable, Callable, Optional
 
-import PTN
 import cloudscraper
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 from db import crud
-from utils.torrent import extract_torrent_metadata
+from scrappers.torrent_store import torrent_store
+from utils.imdb_resolver import imdb_resolver
+from utils.title_parser import parse_title
+from utils.torrent import extract_torrent_metadata_async
 
 
-def get_scrapper_session(proxy_url=None):
+def get_scrapper_session(proxy_url=None, pool_connections=10, pool_maxsize=10):
+    """
+    Creates a cloudscraper session. `pool_connections` is the number of hosts
+    to keep connection pools for and `pool_maxsize` the keep-alive connections per host.
+    """
     session = requests.session()
     session.headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36"
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/118.0.0.0 Safari/537.36",
+        "Accept-Encoding": "gzip, deflate, br",
     }
-    adapter = HTTPAdapter(
-        max_retries=Retry(total=10, read=10, connect=10, backoff_factor=0.5)
-    )
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
     if proxy_url:
         session.proxies = {
             "http": proxy_url,
@@ -30,9 +35,113 @@ def get_scrapper_session(proxy_url=None):
         delay=10,
         sess=session,
     )
+    # cloudscraper doesn't copy the adapters from `sess`, mount them on the scraper
+    adapter = HTTPAdapter(
+        pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize,
+        max_retries=Retry(total=10, read=10, connect=10, backoff_factor=0.5),
+    )
+    scraper.mount("http://", adapter)
+    scraper.mount("https://", adapter)
     return scraper
 
 
+def get_connection_stats(session: requests.Session) -> dict:
+    """
+    Returns the number of new connections (TLS handshakes for https) and the requests
+    made over the connection pools of the session.
+    """
+    stats = {"connections": 0, "requests": 0}
+    adapters = {id(adapter): adapter for adapter in session.adapters.values()}
+    for adapter in adapters.values():
+        pool_manager = adapter.poolmanager
+        for pool_key in pool_manager.pools.keys():
+            pool = pool_manager.pools[pool_key]
+            stats["connections"] += pool.num_connections
+            stats["requests"] += pool.num_requests
+    return stats
+
+
+class RateLimiter:
+    """
+    Token bucket rate limiter, allows `rate` acquisitions per second with bursts
+    up to `capacity`. ex: `async with rate_limiter: await fetch(url)`
+    """
+
+    def __init__(self, rate: float, capacity: int = 1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated_at) * self.rate
+                )
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    async def __aenter__(self):
+        await self.acquire()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+async def process_paginated_results(
+    movies: list,
+    number_of_pages: int,
+    fetch_page: Callable[[int], Awaitable[list]],
+    process_movie: Callable[..., Awaitable],
+    rate_limiter: RateLimiter,
+    max_workers: int = 4,
+):
+    """
+    Fetches the pages 2..N concurrently under the rate limiter and streams their
+    results into the topic workers as soon as each page arrives.
+    """
+    queue = asyncio.Queue()
+    for movie in movies:
+        queue.put_nowait(movie)
+
+    async def fetch(page_number: int):
+        async with rate_limiter:
+            try:
+                page_movies = await fetch_page(page_number)
+            except Exception as e:
+                logging.error(f"Error fetching results page {page_number}: {e}")
+                return
+        for page_movie in page_movies:
+            queue.put_nowait(page_movie)
+
+    async def worker():
+        while True:
+            movie = await queue.get()
+            try:
+                await process_movie(movie)
+            except Exception as e:
+                logging.error(f"Error processing result: {e}", exc_info=True)
+            finally:
+                queue.task_done()
+
+    workers = [asyncio.create_task(worker()) for _ in range(max_workers)]
+    try:
+        await asyncio.gather(
+            *[fetch(page_number) for page_number in range(2, number_of_pages + 1)]
+        )
+        await queue.join()
+    finally:
+        for worker_task in workers:
+            worker_task.cancel()
+
+
 async def check_cloudflare_validation(page):
     if await page.title() == "Just a moment...":
         logging.info("Cloudflare validation required")
@@ -45,52 +154,88 @@ async def get_page_content(page, url):
     return await page.content()
 
 
-async def download_and_save_torrent(
+async def prefetch_imdb_data(topic_titles: list[str]):
+    """
+    Resolves the IMDb data of all the new titles of a page at once,
+    so the torrents of the page are saved with a warm resolver cache.
+    """
+    titles = []
+    for topic_title in topic_titles:
+        parsed_data = parse_title(topic_title)
+        if parsed_data.get("title") and parsed_data.get("year"):
+            titles.append((parsed_data["title"], parsed_data["year"]))
+
+    titles = await crud.get_unknown_titles(titles)
+    if titles:
+        logging.info(f"Resolving IMDb data for {len(titles)} titles")
+        await imdb_resolver.resolve_many(titles)
+
+
+async def download_torrent_metadata(
     torrent_element,
     metadata: dict,
     media_type: str,
     page_link: str,
     scraper=None,
     page=None,
-):
+) -> Optional[dict]:
+    """
+    Downloads & parses the torrent into the metadata. Returns None when the torrent
+    can't be saved, ex: missing info hash, year or season.
+    """
     torrent_link = torrent_element.get("href")
-    logging.info(f"Downloading torrent: {torrent_link}")
+    torrent_metadata = torrent_store.get(torrent_link)
 
-    if scraper:
-        response = scraper.get(torrent_link)
-        torrent_metadata = extract_torrent_metadata(response.content)
-    elif page:
-        async with page.expect_download() as download_info:
-            try:
-                await page.goto(torrent_link)
-            except:
-                pass
-        download = await download_info.value
-        torrent_path = await download.path()
-        with open(torrent_path, "rb") as torrent_file:
-            torrent_metadata = extract_torrent_metadata(torrent_file.read())
+    if not torrent_metadata:
+        logging.info(f"Downloading torrent: {torrent_link}")
+        if scraper:
+            response = await scraper.get(torrent_link)
+            content, etag = response.content, response.headers.get("ETag")
+        else:
+            # Fetched with the page's browser context (cookies & clearance) in memory
+            response = await page.context.request.get(torrent_link)
+            content, etag = await response.body(), response.headers.get("etag")
+
+        torrent_metadata = await extract_torrent_metadata_async(content)
+        if torrent_metadata:
+            torrent_store.put(torrent_link, content, torrent_metadata, etag)
 
     if not torrent_metadata:
         logging.error(f"Info hash not found for {torrent_link}")
-        return False
+        return None
 
-    parsed_data = PTN.parse(torrent_metadata["torrent_name"])
+    parsed_data = parse_title(torrent_metadata["torrent_name"])
     metadata.update({"torrent_metadata": torrent_metadata, **parsed_data})
 
     if not metadata.get("year"):
         logging.error(f"Year not found for {page_link}")
-        return False
+        return None
 
-    # Saving the metadata
-    if media_type == "series":
-        if not metadata.get("season"):
-            logging.error(f"Season not found for {page_link}")
-            return False
-        await crud.save_series_metadata(metadata)
-    else:
-        if metadata.get("season"):
-            await crud.save_series_metadata(metadata)
-        else:
-            await crud.save_movie_metadata(metadata)
+    if media_type == "series" and not metadata.get("season"):
+        logging.error(f"Season not found for {page_link}")
+        return None
+
+    return metadata
+
+
+async def download_and_save_torrent(
+    torrent_element,
+    metadata: dict,
+    media_type: str,
+    page_link: str,
+    scraper=None,
+    page=None,
+) -> bool:
+    """
+    Downloads the torrent and saves its stream. Returns True when a new stream was added.
+    """
+    metadata = await download_torrent_metadata(
+        torrent_element, metadata, media_type, page_link, scraper, page
+    )
+    if not metadata:
+        return False
 
-    return True
+    # Saving the metadata, torrents with a season are saved as series
+    if metadata.get("season"):
+        return await crud.save_series_metadata(metadata)
+    return await crud.save_movie_metadata(metadata)
@@ -0,0 +1,131 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from db.config import settings
+
+try:
+    # Lexbor backend, the Modest one (selectolax.parser) is removed in selectolax 1.0
+    from selectolax.lexbor import LexborHTMLParser as HTMLParser
+except ImportError:
+    HTMLParser = None
+
+try:
+    import lxml  # noqa: F401 (used as BeautifulSoup parser)
+
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+
+class HTMLNode(ABC):
+    """
+    Minimal node interface used by the scrapers, implemented by every backend.
+    """
+
+    @abstractmethod
+    def select(self, selector: str) -> list["HTMLNode"]:
+        ...
+
+    @abstractmethod
+    def select_one(self, selector: str) -> Optional["HTMLNode"]:
+        ...
+
+    @abstractmethod
+    def get(self, attribute: str, default=None) -> Optional[str]:
+        ...
+
+    @property
+    @abstractmethod
+    def text(self) -> str:
+        ...
+
+
+class SoupNode(HTMLNode):
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, selector: str) -> list[HTMLNode]:
+        return [SoupNode(node) for node in self.node.select(selector)]
+
+    def select_one(self, selector: str) -> Optional[HTMLNode]:
+        node = self.node.select_one(selector)
+        return SoupNode(node) if node else None
+
+    def get(self, attribute: str, default=None) -> Optional[str]:
+        return self.node.get(attribute, default)
+
+    @property
+    def text(self) -> str:
+        return self.node.get_text()
+
+
+class SelectolaxNode(HTMLNode):
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, selector: str) -> list[HTMLNode]:
+        return [SelectolaxNode(node) for node in self.node.css(selector)]
+
+    def select_one(self, selector: str) -> Optional[HTMLNode]:
+        node = self.node.css_first(selector)
+        return SelectolaxNode(node) if node else None
+
+    def get(self, attribute: str, default=None) -> Optional[str]:
+        return self.node.attributes.get(attribute, default)
+
+    @property
+    def text(self) -> str:
+        return self.node.text()
+
+
+def get_available_backends() -> list[str]:
+    backends = ["html.parser"]
+    if LXML_AVAILABLE:
+        backends.append("lxml")
+    if HTMLParser:
+        backends.append("selectolax")
+    return backends
+
+
+def check_html_backend(backend: str):
+    if backend not in get_available_backends():
+        raise ValueError(
+            f"SCRAPER_HTML_BACKEND {backend!r} is not installed, available backends: "
+            f"{', '.join(get_available_backends())}"
+        )
+
+
+def get_default_backend() -> str:
+    if settings.scraper_html_backend:
+        return settings.scraper_html_backend
+    if HTMLParser:
+        return "selectolax"
+    if LXML_AVAILABLE:
+        return "lxml"
+    return "html.parser"
+
+
+def parse_html(
+    content, parse_only: tuple[str, str] = None, backend: str = None
+) -> HTMLNode:
+    """
+    Parses the page with the selected backend: "selectolax", "lxml" or "html.parser".
+    `parse_only` is a (tag, attribute) pair, ex: ("li", "data-rowid"), that limits the
+    tree built by the BeautifulSoup backends to the matching elements.
+    """
+    backend = backend or get_default_backend()
+    if backend == "selectolax":
+        return SelectolaxNode(HTMLParser(content))
+
+    strainer = None
+    if parse_only:
+        tag, attribute = parse_only
+        strainer = SoupStrainer(tag, attrs={attribute: True})
+    return SoupNode(BeautifulSoup(content, backend, parse_only=strainer))
+
+
+# Fails at startup instead of on the first scraped page
+if settings.scraper_html_backend:
+    check_html_backend(settings.scraper_html_backend)
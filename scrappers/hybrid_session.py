@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import os
+from typing import Optional
+
+import requests
+
+from db.config import settings
+from scrappers.browser_pool import BrowserPool
+from scrappers.helpers import (
+    get_page_content,
+    get_scrapper_session,
+    get_connection_stats,
+)
+from scrappers.page_cache import PageValidatorStore, get_body_hash
+
+
+class HybridSession:
+    """
+    Fetches pages with a cloudscraper session. When cloudflare rejects the session
+    with a 403, the challenge is solved once in a pooled headless browser and its
+    clearance cookies & user agent are exported into the session.
+    """
+
+    def __init__(
+        self,
+        proxy_url: str = None,
+        browser_pool: BrowserPool = None,
+        pool_maxsize: int = 10,
+    ):
+        self.proxy_url = proxy_url
+        self.scraper = get_scrapper_session(proxy_url, pool_maxsize=pool_maxsize)
+        self.browser_pool = browser_pool
+        self._owns_browser_pool = browser_pool is None
+        self._clearance_lock = asyncio.Lock()
+        self._clearance_generation = 0
+        self.page_validators = PageValidatorStore(
+            os.path.join(settings.scraper_cache_dir, "page_validators.json")
+        )
+        self.metrics = {
+            "requests": 0,
+            "clearance_refreshes": 0,
+            "bytes_transferred": 0,
+            "bytes_decoded": 0,
+            "unchanged_pages": 0,
+        }
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        if self._owns_browser_pool and self.browser_pool:
+            await self.browser_pool.close()
+        self.page_validators.save()
+        connection_stats = get_connection_stats(self.scraper)
+        self.scraper.close()
+        logging.info(
+            "Hybrid session: %s requests over %s new connections (TLS handshakes), "
+            "%s cloudflare clearance refreshes",
+            self.metrics["requests"],
+            connection_stats["connections"],
+            self.metrics["clearance_refreshes"],
+        )
+        logging.info(
+            "Hybrid session: %.1f KiB transferred for %.1f KiB of content, "
+            "%s unchanged pages skipped",
+            self.metrics["bytes_transferred"] / 1024,
+            self.metrics["bytes_decoded"] / 1024,
+            self.metrics["unchanged_pages"],
+        )
+
+    async def _get(self, url: str, **kwargs) -> requests.Response:
+        self.metrics["requests"] += 1
+        response = await asyncio.to_thread(self.scraper.get, url, **kwargs)
+        # raw.tell() counts the bytes read from the wire, before decompression
+        self.metrics["bytes_transferred"] += response.raw.tell()
+        self.metrics["bytes_decoded"] += len(response.content)
+        return response
+
+    async def get(self, url: str, **kwargs) -> requests.Response:
+        clearance_generation = self._clearance_generation
+        response = await self._get(url, **kwargs)
+        if response.status_code == 403:
+            logging.info(f"Cloudflare validation required for {url}")
+            await self.refresh_clearance(url, clearance_generation)
+            response = await self._get(url, **kwargs)
+        return response
+
+    async def get_if_modified(self, url: str) -> Optional[requests.Response]:
+        """
+        Fetches the page with a conditional request. Returns None when the page
+        didn't change since it was last marked as processed.
+        """
+        response = await self.get(
+            url, headers=self.page_validators.get_conditional_headers(url)
+        )
+        if response.status_code == 304 or (
+            response.ok
+            and get_body_hash(response.content)
+            == self.page_validators.get_body_hash(url)
+        ):
+            self.metrics["unchanged_pages"] += 1
+            return None
+        return response
+
+    def mark_processed(self, url: str, response: requests.Response):
+        self.page_validators.update(url, response)
+
+    async def refresh_clearance(self, url: str, clearance_generation: int = None):
+        async with self._clearance_lock:
+            if (
+                clearance_generation is not None
+                and clearance_generation != self._clearance_generation
+            ):
+                # Clearance was already refreshed by another request
+                return
+
+            if self.browser_pool is None:
+                self.browser_pool = BrowserPool(self.proxy_url, headless=True)
+
+            async with self.browser_pool.page() as page:
+                await get_page_content(page, url)
+                user_agent = await page.evaluate("navigator.userAgent")
+                cookies = await page.context.cookies()
+
+            self.scraper.headers["User-Agent"] = user_agent
+            for cookie in cookies:
+                self.scraper.cookies.set(
+                    cookie["name"],
+                    cookie["value"],
+                    domain=cookie["domain"],
+                    path=cookie["path"],
+                )
+            self._clearance_generation += 1
+            self.metrics["clearance_refreshes"] += 1
+            logging.info("Cloudflare clearance exported to the scraper session")
@@ -0,0 +1,63 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Optional
+
+import requests
+
+
+class PageValidatorStore:
+    """
+    Stores the ETag, Last-Modified and body hash of the processed pages per URL,
+    so the next run can send conditional requests and skip unchanged pages.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.validators = self._load()
+        self._updated_urls: set[str] = set()
+
+    def _load(self) -> dict[str, dict]:
+        try:
+            with open(self.path) as validators_file:
+                return json.load(validators_file)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logging.warning(f"Ignoring invalid page validators file {self.path}")
+            return {}
+
+    def get_conditional_headers(self, url: str) -> dict:
+        validator = self.validators.get(url, {})
+        headers = {}
+        if validator.get("etag"):
+            headers["If-None-Match"] = validator["etag"]
+        if validator.get("last_modified"):
+            headers["If-Modified-Since"] = validator["last_modified"]
+        return headers
+
+    def get_body_hash(self, url: str) -> Optional[str]:
+        return self.validators.get(url, {}).get("body_hash")
+
+    def update(self, url: str, response: requests.Response):
+        self.validators[url] = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+            "body_hash": get_body_hash(response.content),
+        }
+        self._updated_urls.add(url)
+
+    def save(self):
+        # Merge into the latest file, other scrape runs may have saved in the meantime
+        validators = self._load()
+        validators.update({url: self.validators[url] for url in self._updated_urls})
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, "w") as validators_file:
+            json.dump(validators, validators_file)
+        self.validators = validators
+        self._updated_urls.clear()
+
+
+def get_body_hash(content: bytes) -> str:
+    return hashlib.sha1(content).hexdigest()
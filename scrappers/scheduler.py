@@ -0,0 +1,187 @@
+import asyncio
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+
+from db.config import settings
+from scrappers.base import ScraperSource
+from scrappers.engine import ScraperEngine
+
+# Weight of the latest run in the new topics per hour moving average
+YIELD_SMOOTHING = 0.5
+# Max growth of the interval after a run without new topics
+MAX_INTERVAL_GROWTH = 2
+
+
+class AdaptiveScrapeScheduler:
+    """
+    Schedules every forum of the sources as its own interval job. After each run the
+    interval is adjusted to the forum's new topics per hour, so busy forums are
+    scraped often and quiet ones back off up to the max interval. Each source keeps
+    one headless engine for all its runs, so its session, connections and cloudflare
+    clearance are reused between ticks.
+    """
+
+    def __init__(self, scheduler: AsyncIOScheduler, sources: list[ScraperSource]):
+        self.scheduler = scheduler
+        self.sources = sources
+        # One forum scrape per source at a time, keeps the per source rate limits
+        self.source_locks = {source.name: asyncio.Lock() for source in sources}
+        self.engines: dict[str, ScraperEngine] = {}
+        self.stats_path = os.path.join(settings.scraper_cache_dir, "forum_schedule.json")
+        self.stats: dict[str, dict] = self._load_stats()
+
+    def _load_stats(self) -> dict[str, dict]:
+        try:
+            with open(self.stats_path) as stats_file:
+                return json.load(stats_file)
+        except FileNotFoundError:
+            return {}
+        except ValueError:
+            logging.warning(f"Ignoring invalid forum schedule file {self.stats_path}")
+            return {}
+
+    def _save_stats(self):
+        os.makedirs(settings.scraper_cache_dir, exist_ok=True)
+        with open(self.stats_path, "w") as stats_file:
+            json.dump(self.stats, stats_file)
+
+    @staticmethod
+    def get_job_id(source: ScraperSource, language: str, video_type: str) -> str:
+        return f"{source.name}:{language}_{video_type}"
+
+    def start(self):
+        start_time = datetime.now()
+        for source in self.sources:
+            forums = [
+                (language, video_type)
+                for language in source.forum_links
+                for video_type in source.forum_links[language]
+            ]
+            for index, (language, video_type) in enumerate(forums):
+                job_id = self.get_job_id(source, language, video_type)
+                forum_stats = self.stats.setdefault(
+                    job_id,
+                    {
+                        "interval": settings.scraper_default_interval,
+                        "runs": 0,
+                        "topics": 0,
+                        "new_topics": 0,
+                        "new_streams": 0,
+                        "new_topics_per_hour": None,
+                        "last_run": None,
+                    },
+                )
+                self.scheduler.add_job(
+                    self.run_forum,
+                    IntervalTrigger(seconds=forum_stats["interval"]),
+                    args=[source, language, video_type],
+                    id=job_id,
+                    name=job_id,
+                    max_instances=1,
+                    coalesce=True,
+                    # Spread the first runs instead of starting every forum at once
+                    next_run_time=start_time + timedelta(minutes=index),
+                )
+
+    async def get_engine(self, source: ScraperSource) -> ScraperEngine:
+        if source.name not in self.engines:
+            engine = ScraperEngine(source, headless=True)
+            await engine.__aenter__()
+            self.engines[source.name] = engine
+        return self.engines[source.name]
+
+    async def close(self):
+        for engine in self.engines.values():
+            await engine.__aexit__(None, None, None)
+        self.engines.clear()
+
+    async def run_forum(self, source: ScraperSource, language: str, video_type: str):
+        job_id = self.get_job_id(source, language, video_type)
+        async with self.source_locks[source.name]:
+            try:
+                engine = await self.get_engine(source)
+                # Topics are deduplicated per run, a seen topic may get new torrents
+                engine.seen_topics.clear()
+                run_stats = await engine.run_scraper(
+                    language, video_type, pages=1, start_page=1
+                )
+                engine.scraper.page_validators.save()
+            except Exception as e:
+                logging.error(f"Error scraping {job_id}: {e}", exc_info=True)
+                return
+
+        self.update_schedule(job_id, run_stats or {})
+
+    def update_schedule(self, job_id: str, run_stats: dict):
+        forum_stats = self.stats[job_id]
+        now = datetime.now()
+        if forum_stats["last_run"]:
+            elapsed_hours = (
+                now - datetime.fromisoformat(forum_stats["last_run"])
+            ).total_seconds() / 3600
+        else:
+            elapsed_hours = forum_stats["interval"] / 3600
+
+        new_topics = run_stats.get("new_topics", 0)
+        new_topics_per_hour = new_topics / max(elapsed_hours, 1 / 60)
+        if forum_stats["new_topics_per_hour"] is not None:
+            new_topics_per_hour = (
+                YIELD_SMOOTHING * new_topics_per_hour
+                + (1 - YIELD_SMOOTHING) * forum_stats["new_topics_per_hour"]
+            )
+
+        # Aim for the target number of new topics per run within the bounds
+        if new_topics_per_hour > 0:
+            interval = settings.scraper_target_new_topics / new_topics_per_hour * 3600
+        else:
+            interval = settings.scraper_max_interval
+        interval = min(interval, forum_stats["interval"] * MAX_INTERVAL_GROWTH)
+        interval = int(
+            max(
+                settings.scraper_min_interval,
+                min(interval, settings.scraper_max_interval),
+            )
+        )
+
+        forum_stats.update(
+            {
+                "interval": interval,
+                "runs": forum_stats["runs"] + 1,
+                "topics": forum_stats["topics"] + run_stats.get("topics", 0),
+                "new_topics": forum_stats["new_topics"] + new_topics,
+                "new_streams": forum_stats["new_streams"]
+                + run_stats.get("new_streams", 0),
+                "new_topics_per_hour": round(new_topics_per_hour, 4),
+                "last_run": now.isoformat(),
+            }
+        )
+        self._save_stats()
+
+        self.scheduler.reschedule_job(job_id, trigger=IntervalTrigger(seconds=interval))
+        logging.info(
+            f"{job_id}: {new_topics} new topics, "
+            f"{new_topics_per_hour:.2f} new topics/hour, next run in {interval}s"
+        )
+
+    def get_schedule(self) -> list[dict]:
+        schedule = []
+        for job_id, forum_stats in sorted(self.stats.items()):
+            job = self.scheduler.get_job(job_id)
+            if job is None:
+                continue
+            schedule.append(
+                {
+                    "forum": job_id,
+                    "next_run_time": job.next_run_time,
+                    "yield_rate": forum_stats["new_topics"] / forum_stats["topics"]
+                    if forum_stats["topics"]
+                    else None,
+                    **forum_stats,
+                }
+            )
+        return schedule
@@ -0,0 +1,89 @@
+import hashlib
+import json
+import logging
+import os
+import re
+from typing import Optional
+
+from db.config import settings
+
+
+def get_attachment_key(torrent_link: str) -> str:
+    """
+    Returns the topic & attachment id of the IPS attachment link. The links carry a
+    per session csrfKey, so the raw URL is only used when the ids are not found.
+    """
+    topic = re.search(r"/topic/(\d+)", torrent_link)
+    attachment = re.search(r"[?&]attachment=(\d+)", torrent_link)
+    if topic and attachment:
+        return f"topic:{topic[1]}:attachment:{attachment[1]}"
+    return torrent_link
+
+
+class TorrentStore:
+    """
+    Local store of the downloaded torrents. The torrent bytes are stored by their
+    content hash and each attachment keeps its info hash, ETag and parsed metadata,
+    so attachments seen in previous runs are not downloaded again.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.metrics = {"hits": 0, "misses": 0}
+
+    def _get_attachment_path(self, torrent_link: str) -> str:
+        key_hash = hashlib.sha1(get_attachment_key(torrent_link).encode()).hexdigest()
+        return os.path.join(self.directory, "attachments", f"{key_hash}.json")
+
+    def _get_content_path(self, content_hash: str) -> str:
+        return os.path.join(
+            self.directory, "content", content_hash[:2], f"{content_hash}.torrent"
+        )
+
+    def get(self, torrent_link: str) -> Optional[dict]:
+        """
+        Returns the parsed torrent metadata of the attachment when it's in the store.
+        """
+        try:
+            with open(self._get_attachment_path(torrent_link)) as attachment_file:
+                attachment = json.load(attachment_file)
+        except FileNotFoundError:
+            self.metrics["misses"] += 1
+            return None
+        except ValueError:
+            logging.warning(f"Ignoring invalid torrent store entry for {torrent_link}")
+            self.metrics["misses"] += 1
+            return None
+        self.metrics["hits"] += 1
+        return attachment["metadata"]
+
+    def put(
+        self, torrent_link: str, content: bytes, metadata: dict, etag: str = None
+    ):
+        content_hash = hashlib.sha1(content).hexdigest()
+        content_path = self._get_content_path(content_hash)
+        if not os.path.exists(content_path):
+            self._write(content_path, content)
+
+        attachment = {
+            "url": torrent_link,
+            "content_hash": content_hash,
+            "info_hash": metadata["info_hash"],
+            "etag": etag,
+            "metadata": metadata,
+        }
+        self._write(
+            self._get_attachment_path(torrent_link), json.dumps(attachment).encode()
+        )
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        # Written to a temp file first, so concurrent scrape runs never read partial files
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as temp_file:
+            temp_file.write(data)
+        os.replace(temp_path, path)
+
+
+torrent_store = TorrentStore(os.path.join(settings.scraper_cache_dir, "torrents"))
@@ -5,8 +5,7 @@ from db.models import Streams, Episode
 from db.schemas import UserData
 from streaming_providers.exceptions import ProviderException
 from streaming_providers.debridlink.client import DebridLink
-
-import PTN
+from utils.title_parser import parse_episode_info
 
 
 def get_direct_link_from_debridlink(
@@ -95,8 +94,7 @@ def select_episode_file(torrent_files: list, episode: int, file_name_key: str) -
     """Select the file with the specified episode number."""
 
     for file in torrent_files:
-        torrent_data = PTN.parse(file[file_name_key])
-        file_episode = torrent_data.get("episode")
+        _, file_episode = parse_episode_info(file[file_name_key])
         if file_episode and int(file_episode) == episode:
             return file
     else:
@@ -1,3 +1,4 @@
+import time
 import traceback
 from base64 import b64encode, b64decode
 from typing import Any
@@ -6,6 +7,7 @@ import requests
 from requests import RequestException, JSONDecodeError
 
 from streaming_providers.exceptions import ProviderException
+from utils.metrics import observe_provider_request
 
 
 class RealDebrid:
@@ -31,14 +33,22 @@ class RealDebrid:
         is_return_none=False,
         is_expected_to_fail=False,
     ) -> dict:
-        if method == "GET":
-            response = requests.get(url, params=params, headers=self.headers)
-        elif method == "POST":
-            response = requests.post(url, data=data, headers=self.headers)
-        elif method == "DELETE":
-            response = requests.delete(url, headers=self.headers)
-        else:
-            raise ValueError(f"Unsupported method: {method}")
+        start_time = time.perf_counter()
+        try:
+            if method == "GET":
+                response = requests.get(url, params=params, headers=self.headers)
+            elif method == "POST":
+                response = requests.post(url, data=data, headers=self.headers)
+            elif method == "DELETE":
+                response = requests.delete(url, headers=self.headers)
+            else:
+                raise ValueError(f"Unsupported method: {method}")
+        except RequestException as error:
+            observe_provider_request(
+                "realdebrid", method, type(error).__name__, start_time
+            )
+            raise
+        observe_provider_request("realdebrid", method, response.status_code, start_time)
 
         try:
             response.raise_for_status()
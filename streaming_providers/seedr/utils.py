@@ -7,8 +7,12 @@ from seedrcc import Seedr
 from db.models import Streams, Episode
 from db.schemas import UserData
 from streaming_providers.exceptions import ProviderException
+from utils.metrics import InstrumentedClient
 from utils.parser import clean_name
 
+# OAuth bearer token errors (RFC 6750), the other errors are counted as "error"
+SEEDR_ERRORS = frozenset({"invalid_request", "invalid_token", "insufficient_scope"})
+
 
 def check_torrent_status(seedr, info_hash: str):
     """Checks if a torrent with a given info_hash is currently downloading."""
@@ -90,7 +94,9 @@ async def get_direct_link_from_seedr(
     retry_interval=5,
 ) -> str:
     """Gets a direct download link from Seedr using a magnet link and token."""
-    seedr = Seedr(token=user_data.streaming_provider.token)
+    seedr = InstrumentedClient(
+        Seedr(token=user_data.streaming_provider.token), "seedr", SEEDR_ERRORS
+    )
 
     # Check for existing torrent or folder
     torrent = check_torrent_status(seedr, info_hash)
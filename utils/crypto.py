@@ -1,3 +1,6 @@
+from functools import lru_cache
+from typing import Optional
+
 from Crypto.Cipher import AES
 from Crypto.Random import get_random_bytes
 from base64 import urlsafe_b64encode, urlsafe_b64decode
@@ -5,6 +8,8 @@ from base64 import urlsafe_b64encode, urlsafe_b64decode
 from db.config import settings
 from db.schemas import UserData
 
+USER_DATA_CACHE_SIZE = 4096
+
 
 def encrypt_user_data(user_data: UserData) -> str:
     data = user_data.model_dump_json(
@@ -18,6 +23,18 @@ def encrypt_user_data(user_data: UserData) -> str:
 
 
 def decrypt_user_data(secret_str: str = None) -> UserData:
+    return _decrypt_user_data(secret_str)
+
+
+def get_user_data_cache_info():
+    return _decrypt_user_data.cache_info()
+
+
+@lru_cache(maxsize=USER_DATA_CACHE_SIZE)
+def _decrypt_user_data(secret_str: Optional[str]) -> UserData:
+    """
+    Cached per secret string, repeated requests of the same install skip the decryption.
+    """
     if not secret_str:
         return UserData()
     try:
@@ -0,0 +1,226 @@
+import asyncio
+import logging
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+
+import httpx
+from beanie.operators import In
+from imdb import Cinemagoer, IMDbDataAccessError
+
+from db.config import settings
+from db.models import IMDbLookup
+
+ia = Cinemagoer()
+
+
+def normalize_title(title: str) -> str:
+    """
+    Normalize the title for cache lookups. ex: "Leo: Bloody Sweet" -> "leo bloody sweet"
+    """
+    return " ".join(re.sub(r"[^\w]+", " ", title.casefold()).split())
+
+
+def get_cache_key(title: str, year: Optional[int]) -> str:
+    return f"{normalize_title(title)}:{year or ''}"
+
+
+def search_imdb(
+    title: str, year: Optional[int]
+) -> tuple[Optional[str], Optional[str]]:
+    """
+    Blocking Cinemagoer search. Returns the matched IMDb ID and its cover url.
+    """
+    result = ia.search_movie(f"{title} {year}")
+    for movie in result:
+        if movie.get("year") == year and movie.get("title").lower() in title.lower():
+            return f"tt{movie.movieID}", movie.get("full-size cover url")
+    return None, None
+
+
+class IMDbResolver:
+    """
+    Resolves titles to IMDb data with a persistent cache of positive and negative
+    results. Lookups run concurrently, bounded by a semaphore and a request rate.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        requests_per_second: float,
+        negative_cache_ttl: int,
+        max_retries: int = 5,
+        memory_cache_size: int = 10000,
+    ):
+        self.max_concurrency = max_concurrency
+        self.request_interval = 1 / requests_per_second
+        self.negative_cache_ttl = timedelta(seconds=negative_cache_ttl)
+        self.max_retries = max_retries
+        self.memory_cache_size = memory_cache_size
+        self._memory_cache: OrderedDict[str, IMDbLookup] = OrderedDict()
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._loop = None
+        self._semaphore = None
+        self._rate_lock = None
+        self._next_request_at = 0.0
+        # Lookups served from the memory or DB cache vs searched on IMDb
+        self.metrics = {"hits": 0, "misses": 0}
+
+    def _init_limits(self):
+        # asyncio primitives are bound to the running loop, create them lazily.
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._rate_lock = asyncio.Lock()
+            self._in_flight = {}
+
+    async def _wait_for_rate_limit(self):
+        async with self._rate_lock:
+            delay = self._next_request_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self._next_request_at = time.monotonic() + self.request_interval
+
+    def _remember(self, lookup: IMDbLookup):
+        self._memory_cache[lookup.id] = lookup
+        self._memory_cache.move_to_end(lookup.id)
+        if len(self._memory_cache) > self.memory_cache_size:
+            self._memory_cache.popitem(last=False)
+
+    def _get_from_memory(self, key: str) -> Optional[IMDbLookup]:
+        lookup = self._memory_cache.get(key)
+        if lookup and lookup.expire_at and lookup.expire_at < datetime.now():
+            del self._memory_cache[key]
+            return None
+        return lookup
+
+    @staticmethod
+    def _to_result(lookup: IMDbLookup) -> dict:
+        if not lookup.imdb_id:
+            return {}
+        return {
+            "imdb_id": lookup.imdb_id,
+            "poster": lookup.poster,
+            "background": lookup.background,
+        }
+
+    async def _fetch_imdb_data(self, title: str, year: Optional[int]) -> dict:
+        for attempt in range(self.max_retries):
+            async with self._semaphore:
+                await self._wait_for_rate_limit()
+                try:
+                    imdb_id, cover_url = await asyncio.to_thread(
+                        search_imdb, title, year
+                    )
+                    break
+                except IMDbDataAccessError as error:
+                    logging.warning(
+                        "IMDb lookup failed for %s (%s): %s", title, year, error
+                    )
+            if attempt < self.max_retries - 1:
+                await asyncio.sleep(2**attempt)
+        else:
+            raise IMDbDataAccessError(f"IMDb lookup failed for {title} ({year})")
+
+        if not imdb_id:
+            return {}
+
+        poster = f"https://live.metahub.space/poster/small/{imdb_id}/img"
+        async with httpx.AsyncClient() as client:
+            try:
+                response = await client.get(poster, timeout=10)
+                has_metahub_poster = response.status_code == 200
+            except httpx.HTTPError:
+                has_metahub_poster = False
+
+        if has_metahub_poster:
+            return {
+                "imdb_id": imdb_id,
+                "poster": poster.replace("small", "medium"),
+                "background": f"https://live.metahub.space/background/medium/{imdb_id}/img",
+            }
+        return {"imdb_id": imdb_id, "poster": cover_url, "background": cover_url}
+
+    async def _lookup(self, key: str, title: str, year: Optional[int]) -> dict:
+        try:
+            imdb_data = await self._fetch_imdb_data(title, year)
+        except IMDbDataAccessError as error:
+            # Transient failures are not cached
+            logging.error(error)
+            return {}
+
+        lookup = IMDbLookup(
+            id=key,
+            **imdb_data,
+            expire_at=None
+            if imdb_data
+            else datetime.now() + self.negative_cache_ttl,
+        )
+        await lookup.save()
+        self._remember(lookup)
+        return imdb_data
+
+    async def resolve(self, title: str, year: Optional[int]) -> dict:
+        """
+        Returns the IMDb data (imdb_id, poster, background) for the title or an
+        empty dict when no match is found.
+        """
+        self._init_limits()
+        key = get_cache_key(title, year)
+
+        lookup = self._get_from_memory(key)
+        if lookup:
+            self.metrics["hits"] += 1
+            return self._to_result(lookup)
+
+        if key in self._in_flight:
+            return await asyncio.shield(self._in_flight[key])
+
+        future = asyncio.ensure_future(self._resolve_uncached(key, title, year))
+        self._in_flight[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def _resolve_uncached(self, key: str, title: str, year: Optional[int]):
+        lookup = await IMDbLookup.get(key)
+        if lookup and not (lookup.expire_at and lookup.expire_at < datetime.now()):
+            self._remember(lookup)
+            self.metrics["hits"] += 1
+            return self._to_result(lookup)
+        self.metrics["misses"] += 1
+        return await self._lookup(key, title, year)
+
+    async def resolve_many(self, titles: list[tuple[str, Optional[int]]]) -> list[dict]:
+        """
+        Resolves a batch of (title, year) pairs, ex: all the topics of a listing page.
+        Cached entries are loaded with a single query and the rest run concurrently.
+        """
+        self._init_limits()
+        keys = [get_cache_key(title, year) for title, year in titles]
+        missing_keys = list(
+            {key for key in keys if not self._get_from_memory(key)}
+        )
+        if missing_keys:
+            now = datetime.now()
+            async for lookup in IMDbLookup.find(In(IMDbLookup.id, missing_keys)):
+                if not (lookup.expire_at and lookup.expire_at < now):
+                    self._remember(lookup)
+
+        pending = {}
+        for key, (title, year) in zip(keys, titles):
+            if key not in pending:
+                pending[key] = self.resolve(title, year)
+        results = dict(zip(pending, await asyncio.gather(*pending.values())))
+        return [results[key] for key in keys]
+
+
+imdb_resolver = IMDbResolver(
+    settings.imdb_max_concurrency,
+    settings.imdb_requests_per_second,
+    settings.imdb_negative_cache_ttl,
+)
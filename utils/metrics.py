@@ -0,0 +1,418 @@
+import json
+import logging
+import random
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Callable, Optional
+from urllib.parse import parse_qs
+
+# Latency buckets in seconds, from cached lookups to the slow provider calls
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30
+)
+
+
+def escape_label_value(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(label_names: tuple[str, ...], label_values: tuple) -> str:
+    if not label_names:
+        return ""
+    labels = ",".join(
+        f'{name}="{escape_label_value(value)}"'
+        for name, value in zip(label_names, label_values)
+    )
+    return f"{{{labels}}}"
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, label_names: tuple = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.values: dict[tuple, float] = {}
+
+    def inc(self, *label_values, amount: float = 1):
+        self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        for label_values, value in sorted(self.values.items()):
+            lines.append(
+                f"{self.name}{format_labels(self.label_names, label_values)} {value}"
+            )
+        return lines
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple = (),
+        buckets: tuple = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = label_names
+        self.buckets = buckets
+        # Per labels: the bucket counts (not cumulative), the sum & the count
+        self.values: dict[tuple, list] = {}
+
+    def observe(self, value: float, *label_values):
+        observations = self.values.get(label_values)
+        if observations is None:
+            observations = self.values[label_values] = [[0] * len(self.buckets), 0, 0]
+        index = bisect_left(self.buckets, value)
+        if index < len(self.buckets):
+            observations[0][index] += 1
+        observations[1] += value
+        observations[2] += 1
+
+    def render(self) -> list[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        bucket_label_names = self.label_names + ("le",)
+        for label_values, (bucket_counts, total, count) in sorted(self.values.items()):
+            cumulative_count = 0
+            for bucket, bucket_count in zip(self.buckets, bucket_counts):
+                cumulative_count += bucket_count
+                bucket_labels = format_labels(
+                    bucket_label_names, label_values + (bucket,)
+                )
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative_count}")
+            bucket_labels = format_labels(bucket_label_names, label_values + ("+Inf",))
+            labels = format_labels(self.label_names, label_values)
+            lines.append(f"{self.name}_bucket{bucket_labels} {count}")
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    In-process registry of the metrics, rendered in the Prometheus text format.
+    Updates are plain dict operations on the event loop thread, without locks.
+    Caches register a function returning their (hits, misses), read on render.
+    """
+
+    def __init__(self):
+        self.metrics: list = []
+        self.caches: dict[str, Callable[[], tuple[int, int]]] = {}
+
+    def counter(self, name: str, documentation: str, label_names: tuple = ()):
+        counter = Counter(name, documentation, label_names)
+        self.metrics.append(counter)
+        return counter
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: tuple = (),
+        buckets: tuple = DEFAULT_BUCKETS,
+    ):
+        histogram = Histogram(name, documentation, label_names, buckets)
+        self.metrics.append(histogram)
+        return histogram
+
+    def register_cache(self, name: str, get_stats: Callable[[], tuple[int, int]]):
+        self.caches[name] = get_stats
+
+    def render_caches(self) -> list[str]:
+        cache_stats = {name: get_stats() for name, get_stats in self.caches.items()}
+        lines = []
+        for metric, metric_type, documentation, get_value in (
+            ("cache_hits_total", "counter", "Cache hits.", lambda h, m: h),
+            ("cache_misses_total", "counter", "Cache misses.", lambda h, m: m),
+            (
+                "cache_hit_ratio",
+                "gauge",
+                "Share of the cache lookups served from the cache.",
+                lambda h, m: h / (h + m) if h + m else 0,
+            ),
+        ):
+            name = f"mediafusion_{metric}"
+            lines.append(f"# HELP {name} {documentation}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for cache, (hits, misses) in sorted(cache_stats.items()):
+                lines.append(f'{name}{{cache="{cache}"}} {get_value(hits, misses)}')
+        return lines
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        lines.extend(self.render_caches())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUEST_DURATION = registry.histogram(
+    "mediafusion_http_request_duration_seconds",
+    "Latency of the HTTP requests by route.",
+    ("method", "route", "status"),
+)
+PROVIDER_REQUESTS = registry.counter(
+    "mediafusion_provider_requests_total",
+    "Streaming provider API calls by status code or error.",
+    ("provider", "method", "status"),
+)
+PROVIDER_REQUEST_DURATION = registry.histogram(
+    "mediafusion_provider_request_duration_seconds",
+    "Latency of the streaming provider API calls.",
+    ("provider", "method"),
+)
+DB_OPERATION_DURATION = registry.histogram(
+    "mediafusion_db_operation_duration_seconds",
+    "Latency of the database operations.",
+    ("operation",),
+)
+
+
+def observe_provider_request(provider: str, method: str, status, start_time: float):
+    PROVIDER_REQUESTS.inc(provider, method, status)
+    PROVIDER_REQUEST_DURATION.observe(
+        time.perf_counter() - start_time, provider, method
+    )
+
+
+@contextmanager
+def timed_db_operation(operation: str):
+    """
+    Observes the duration of the block running a database operation.
+    """
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        DB_OPERATION_DURATION.observe(time.perf_counter() - start_time, operation)
+
+
+def time_db_operation(function):
+    """
+    Decorator observing the duration of the async crud function, named by the function.
+    Only for the functions running database operations alone, the ones calling other
+    timed functions or external APIs would have them counted as their own time.
+    """
+
+    @wraps(function)
+    async def wrapper(*args, **kwargs):
+        with timed_db_operation(function.__name__):
+            return await function(*args, **kwargs)
+
+    return wrapper
+
+
+class InstrumentedClient:
+    """
+    Proxy of a synchronous provider client observing its method calls. The calls
+    returning an `error` are counted with the error as their status when it's one of
+    the known errors, as "error" otherwise, so the API can't add label values.
+    """
+
+    def __init__(self, client, provider: str, known_errors: frozenset = frozenset()):
+        self._client = client
+        self._provider = provider
+        self._known_errors = known_errors
+
+    def __getattr__(self, name: str):
+        attribute = getattr(self._client, name)
+        if not callable(attribute):
+            return attribute
+
+        @wraps(attribute)
+        def wrapper(*args, **kwargs):
+            start_time = time.perf_counter()
+            try:
+                result = attribute(*args, **kwargs)
+            except Exception as error:
+                observe_provider_request(
+                    self._provider, name, type(error).__name__, start_time
+                )
+                raise
+            status = "ok"
+            if isinstance(result, dict) and result.get("error"):
+                error = result["error"]
+                is_known = isinstance(error, str) and error in self._known_errors
+                status = error if is_known else "error"
+            observe_provider_request(self._provider, name, status, start_time)
+            return result
+
+        return wrapper
+
+
+class RequestMetricsMiddleware:
+    """
+    ASGI middleware observing the request latency by route path template, so the
+    user secrets & ids in the URLs don't create new label values.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        start_time = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            REQUEST_DURATION.observe(
+                time.perf_counter() - start_time,
+                scope["method"],
+                route.path if route else "other",
+                status,
+            )
+
+
+# Phase durations of the request being timed, None when the request isn't timed
+request_timings: ContextVar[Optional[dict[str, float]]] = ContextVar(
+    "request_timings", default=None
+)
+# Name of the innermost phase being timed
+active_phase: ContextVar[Optional[str]] = ContextVar("active_phase", default=None)
+
+
+@contextmanager
+def timed_phase(name: str):
+    """
+    Adds the duration of the block to the phase of the request, when it's timed.
+    A nested phase is taken off the enclosing one, so the phases don't overlap.
+    """
+    timings = request_timings.get()
+    if timings is None:
+        yield
+        return
+    parent_phase = active_phase.get()
+    token = active_phase.set(name)
+    start_time = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start_time
+        active_phase.reset(token)
+        timings[name] = timings.get(name, 0.0) + duration
+        if parent_phase is not None:
+            timings[parent_phase] = timings.get(parent_phase, 0.0) - duration
+
+
+def format_server_timing(timings: dict[str, float], total: float) -> str:
+    return ", ".join(
+        f"{name};dur={duration * 1000:.2f}"
+        for name, duration in [*timings.items(), ("total", total)]
+    )
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware timing the request phases recorded with `timed_phase`. The
+    phases are sent in a Server-Timing header when the request has the
+    `X-Server-Timing` header or the `server_timing` query flag, and a sample of
+    the requests is logged as JSON.
+    """
+
+    def __init__(self, app, sample_rate: float):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    @staticmethod
+    def is_requested(scope) -> bool:
+        if any(name == b"x-server-timing" for name, _ in scope["headers"]):
+            return True
+        query_string = scope.get("query_string", b"")
+        return b"server_timing" in query_string and parse_qs(
+            query_string.decode("latin-1")
+        ).get("server_timing", ["0"])[0] not in ("0", "false")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        is_requested = self.is_requested(scope)
+        is_sampled = random.random() < self.sample_rate
+        if not (is_requested or is_sampled):
+            return await self.app(scope, receive, send)
+
+        timings = {}
+        token = request_timings.set(timings)
+        start_time = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if is_requested:
+                    server_timing = format_server_timing(
+                        timings, time.perf_counter() - start_time
+                    )
+                    message["headers"] = [
+                        *message.get("headers", []),
+                        (b"server-timing", server_timing.encode()),
+                        (b"timing-allow-origin", b"*"),
+                    ]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_timings.reset(token)
+            if is_sampled:
+                route = scope.get("route")
+                logging.info(
+                    json.dumps(
+                        {
+                            "event": "request_timing",
+                            "method": scope["method"],
+                            "route": route.path if route else "other",
+                            "status": status,
+                            "total_ms": round(
+                                (time.perf_counter() - start_time) * 1000, 2
+                            ),
+                            "phases_ms": {
+                                name: round(duration * 1000, 2)
+                                for name, duration in timings.items()
+                            },
+                        }
+                    )
+                )
+
+
+def get_lru_cache_stats(get_cache_info: Callable) -> Callable[[], tuple[int, int]]:
+    """
+    Stats of a functools.lru_cache, read from a function returning its cache info.
+    """
+
+    def get_stats() -> tuple[int, int]:
+        cache_info = get_cache_info()
+        return cache_info.hits, cache_info.misses
+
+    return get_stats
+
+
+def get_metrics_dict_stats(metrics: dict) -> Callable[[], tuple[int, int]]:
+    def get_stats() -> tuple[int, int]:
+        return metrics["hits"], metrics["misses"]
+
+    return get_stats
@@ -1,17 +1,13 @@
 import math
 import re
 
-import requests
-from imdb import Cinemagoer, IMDbDataAccessError
-
 from db.config import settings
 from db.models import Streams
 from db.schemas import Stream, UserData
 from streaming_providers.realdebrid.utils import (
     order_streams_by_instant_availability_and_date,
 )
-
-ia = Cinemagoer()
+from utils.metrics import timed_phase
 
 
 def parse_stream_data(
@@ -21,37 +17,30 @@ def parse_stream_data(
     season: int = None,
     episode: int = None,
 ) -> list[Stream]:
+    """
+    Builds the stream responses. The streams are already filtered by the user's
+    selected catalogs in the DB query.
+    """
     stream_list = []
 
-    # filter out streams that are not available in the user's selected catalog
-    streams = [
-        stream
-        for stream in streams
-        if any(catalog in stream.catalog for catalog in user_data.selected_catalogs)
-    ]
-
     # sort streams by instant availability and date if realdebrid is selected
     if (
         user_data.streaming_provider
         and user_data.streaming_provider.service == "realdebrid"
     ):
-        streams = order_streams_by_instant_availability_and_date(streams, user_data)
+        # Instant availability is looked up from the provider API
+        with timed_phase("provider"):
+            streams = order_streams_by_instant_availability_and_date(
+                streams, user_data
+            )
     else:
         # Sort the streams by created_at time
         streams = sorted(streams, key=lambda x: x.created_at, reverse=True)
 
     for stream_data in streams:
-        quality_detail = " - ".join(
-            filter(
-                None,
-                [
-                    stream_data.quality,
-                    stream_data.resolution,
-                    stream_data.codec,
-                    stream_data.audio,
-                ],
-            )
-        )
+        if stream_data.description is None:
+            # Legacy documents saved without the precomputed descriptors
+            set_stream_descriptors(stream_data)
 
         episode_data = stream_data.get_episode(season, episode)
 
@@ -62,25 +51,16 @@ def parse_stream_data(
         else:
             streaming_provider = "Torrent"
 
-        description_parts = [
-            quality_detail,
-            convert_bytes_to_readable(
-                episode_data.size if episode_data else stream_data.size
-            ),
-            " + ".join(stream_data.languages),
-            stream_data.source,
-            streaming_provider,
-        ]
-        description = ", ".join(filter(lambda x: bool(x), description_parts))
-
         stream_details = {
             "name": "MediaFusion",
-            "description": description,
+            "description": ", ".join(
+                [(episode_data or stream_data).description, streaming_provider]
+            ),
             "infoHash": stream_data.id,
             "fileIdx": episode_data.file_index
             if episode_data
             else stream_data.file_index,
-            "behaviorHints": {"bingeGroup": f"MediaFusion-{quality_detail}"},
+            "behaviorHints": {"bingeGroup": stream_data.binge_group},
         }
 
         if user_data.streaming_provider:
@@ -92,11 +72,38 @@ def parse_stream_data(
             stream_details.pop("fileIdx")
             stream_details["behaviorHints"]["notWebReady"] = True
 
-        stream_list.append(Stream(**stream_details))
+        stream_list.append(Stream.model_construct(**stream_details))
 
     return stream_list
 
 
+def get_stream_description(stream: Streams, quality_detail: str, size: int) -> str:
+    description_parts = [
+        quality_detail,
+        convert_bytes_to_readable(size),
+        " + ".join(stream.languages),
+        stream.source,
+    ]
+    return ", ".join(filter(None, description_parts))
+
+
+def set_stream_descriptors(stream: Streams):
+    """
+    Sets the static description & binge group of the stream and its episodes,
+    the user specific streaming provider is appended while serving the streams.
+    """
+    quality_detail = " - ".join(
+        filter(None, [stream.quality, stream.resolution, stream.codec, stream.audio])
+    )
+    stream.binge_group = f"MediaFusion-{quality_detail}"
+    stream.description = get_stream_description(stream, quality_detail, stream.size)
+    if stream.season:
+        for episode in stream.season.episodes:
+            episode.description = get_stream_description(
+                stream, quality_detail, episode.size
+            )
+
+
 def clean_name(name: str, replace: str = " ") -> str:
     # Only allow alphanumeric characters, spaces, and `.,;:_~-[]()`
     cleaned_name = re.sub(r"[^a-zA-Z0-9 .,;:_~\-()\[\]]", replace, name)
@@ -125,27 +132,3 @@ def get_catalogs(catalog: str, languages: list[str]) -> list[str]:
 
     # Generate the catalog for each supported language
     return [f"{lang.lower()}_{base_catalog}" for lang in languages]
-
-
-def search_imdb(title: str, year: int, retry: int = 5) -> dict:
-    try:
-        result = ia.search_movie(f"{title} {year}")
-    except IMDbDataAccessError:
-        return search_imdb(title, year, retry - 1) if retry > 0 else {}
-    for movie in result:
-        if movie.get("year") == year and movie.get("title").lower() in title.lower():
-            imdb_id = f"tt{movie.movieID}"
-            poster = f"https://live.metahub.space/poster/small/{imdb_id}/img"
-            if requests.get(poster).status_code == 200:
-                return {
-                    "imdb_id": imdb_id,
-                    "poster": poster.replace("small", "medium"),
-                    "background": f"https://live.metahub.space/background/medium/{imdb_id}/img",
-                }
-            poster = movie.get("full-size cover url")
-            return {
-                "imdb_id": imdb_id,
-                "poster": poster,
-                "background": poster,
-            }
-    return {}
@@ -0,0 +1,349 @@
+import math
+import re
+import time
+import unicodedata
+from collections import Counter, OrderedDict, defaultdict
+from heapq import nlargest
+from operator import itemgetter
+from typing import Any, Iterable, Optional
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+# Share of the query trigram weight a title needs to be a result
+MIN_SCORE_RATIO = 0.3
+# Trigrams found in more than this share of the titles don't add new candidates
+MAX_CANDIDATE_RATIO = 0.02
+# Drift of the average title length before the length norms are recomputed
+LENGTH_NORM_TOLERANCE = 0.1
+EXACT_MATCH_BOOST = 2.0
+PREFIX_MATCH_BOOST = 1.0
+
+# Common spelling variations of the transliterated Indian titles.
+# ex: "Ponniyin Selvan" / "Ponniyan Selvan", "Kaithi" / "Kaidhi", "Vikram" / "Vikkram"
+TRANSLITERATION_RULES = [
+    (re.compile(r"(?<=[bcdgjklpst])h+"), ""),
+    (re.compile(r"ee|ie"), "i"),
+    (re.compile(r"oo|ou"), "u"),
+    (re.compile(r"d"), "t"),
+    (re.compile(r"w"), "v"),
+    (re.compile(r"z"), "l"),
+    (re.compile(r"y\b"), "i"),
+    (re.compile(r"(?<=[a-z])[aeiou]+(?=[a-z])"), "a"),
+    (re.compile(r"([a-z])\1+"), r"\1"),
+]
+# The last vowels of a partially typed word may be inner vowels of the title word
+PREFIX_VOWELS_PATTERN = re.compile(r"(?<=[a-z])[aeiou]+$")
+
+
+def normalize_text(text: str) -> str:
+    """
+    Case folds the text, strips the accents & punctuation and collapses the spaces.
+    ex: "Leo: Bloody  Sweet" -> "leo bloody sweet"
+    """
+    text = unicodedata.normalize("NFKD", text.casefold())
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return " ".join(re.sub(r"[^\w]+", " ", text).split())
+
+
+def fold_transliteration(word: str, is_prefix: bool = False) -> str:
+    """
+    Folds the spelling variations of a normalized word to a common key. The inner
+    vowels are merged and the doubled letters collapsed. ex: "ponniyin" -> "panayan"
+    The last vowels of a prefix are folded as inner ones. ex: "ponni" -> "pana"
+    """
+    for pattern, replacement in TRANSLITERATION_RULES:
+        word = pattern.sub(replacement, word)
+    if is_prefix:
+        word = PREFIX_VOWELS_PATTERN.sub("a", word)
+    return word
+
+
+def get_search_key(text: str) -> str:
+    return " ".join(fold_transliteration(word) for word in normalize_text(text).split())
+
+
+def get_prefix_key(text: str) -> str:
+    """
+    Returns the search key of a query whose last word may be partially typed.
+    """
+    words = normalize_text(text).split()
+    return " ".join(
+        fold_transliteration(word, is_prefix=index == len(words) - 1)
+        for index, word in enumerate(words)
+    )
+
+
+def get_padded_trigrams(padded: str) -> Counter:
+    return Counter(padded[i : i + 3] for i in range(len(padded) - 2))
+
+
+def get_trigrams(text: str) -> Counter:
+    """
+    Returns the trigrams of the folded words, padded at both ends.
+    """
+    trigrams = Counter()
+    for word in get_search_key(text).split():
+        trigrams.update(get_padded_trigrams(f"  {word} "))
+    return trigrams
+
+
+def get_query_trigrams(query: str) -> tuple[Counter, set[str]]:
+    """
+    Returns the trigrams of the query and the alternative trigrams of its last word.
+    The last word isn't padded at the end, so a partially typed word matches the
+    titles starting with it. It's folded both as a complete word and as a prefix,
+    the trigrams differing between the two are alternatives.
+    """
+    words = normalize_text(query).split()
+    if not words:
+        return Counter(), set()
+    trigrams = get_trigrams(" ".join(words[:-1]))
+    complete = get_padded_trigrams(f"  {fold_transliteration(words[-1])}")
+    prefix = get_padded_trigrams(f"  {fold_transliteration(words[-1], True)}")
+    trigrams.update(complete & prefix)
+    return trigrams, set(complete) ^ set(prefix)
+
+
+class SearchIndex:
+    """
+    In-memory trigram index of the titles & aliases of one metadata type, ranked with
+    BM25. Trigrams of the transliteration folded words give prefix matching and typo
+    tolerance. Documents are added as the streams are ingested and the index is
+    rebuilt periodically to pick up the changes made by other processes.
+    """
+
+    def __init__(self):
+        self.postings: dict[str, dict[str, int]] = defaultdict(dict)
+        self.document_trigrams: dict[str, Counter] = {}
+        self.document_keys: dict[str, set[str]] = {}
+        self.document_names: dict[str, set[str]] = {}
+        self.document_lengths: dict[str, int] = {}
+        self.document_norms: dict[str, float] = {}
+        self.norm_average_length = 0.0
+        self.total_length = 0
+        self.is_built = False
+
+    def __len__(self):
+        return len(self.document_trigrams)
+
+    def add(self, doc_id: str, names: Iterable[str]) -> bool:
+        """
+        Indexes the names of the document, merged with its already indexed names.
+        Returns True when the document or some of its names are new. Documents
+        without any searchable name, ex: only punctuation, aren't indexed.
+        """
+        indexed_names = self.document_names.get(doc_id)
+        names = (indexed_names or set()) | {name for name in names if name}
+        if names == indexed_names:
+            return False
+
+        keys = {get_search_key(name) for name in names} - {""}
+        if not keys:
+            return False
+        self.remove(doc_id)
+        trigrams = Counter()
+        for key in keys:
+            # Aliases sharing trigrams don't inflate the term frequency
+            trigrams |= get_trigrams(key)
+
+        self.document_names[doc_id] = names
+        self.document_keys[doc_id] = keys
+        self.document_trigrams[doc_id] = trigrams
+        self.document_lengths[doc_id] = sum(trigrams.values())
+        self.total_length += self.document_lengths[doc_id]
+        for trigram, frequency in trigrams.items():
+            self.postings[trigram][doc_id] = frequency
+        self._update_norms(doc_id)
+        return True
+
+    def _update_norms(self, doc_id: str):
+        """
+        Keeps the BM25 length norm of the documents, recomputed for all of them
+        only when the average length drifted.
+        """
+        average_length = self.total_length / len(self.document_lengths)
+        if (
+            abs(average_length - self.norm_average_length)
+            > LENGTH_NORM_TOLERANCE * self.norm_average_length
+        ):
+            self.norm_average_length = average_length
+            self.document_norms = {
+                doc_id: K1 * (1 - B + B * length / average_length)
+                for doc_id, length in self.document_lengths.items()
+            }
+        else:
+            self.document_norms[doc_id] = K1 * (
+                1 - B + B * self.document_lengths[doc_id] / self.norm_average_length
+            )
+
+    def remove(self, doc_id: str):
+        trigrams = self.document_trigrams.pop(doc_id, None)
+        if trigrams is None:
+            return
+        self.document_keys.pop(doc_id)
+        self.document_names.pop(doc_id)
+        self.total_length -= self.document_lengths.pop(doc_id)
+        self.document_norms.pop(doc_id)
+        for trigram in trigrams:
+            postings = self.postings[trigram]
+            postings.pop(doc_id)
+            if not postings:
+                del self.postings[trigram]
+
+    def search(self, query: str, limit: int = 50) -> list[str]:
+        """
+        Returns the ids of the best matching documents, most relevant first.
+        """
+        query_trigrams, alternative_trigrams = get_query_trigrams(query)
+        if not query_trigrams or not self.document_trigrams:
+            return []
+
+        document_count = len(self.document_trigrams)
+        norms = self.document_norms
+        max_candidates = document_count * MAX_CANDIDATE_RATIO
+        scores = {}
+        max_score = 0.0
+        # Rarest trigrams first, the common ones only score the found candidates
+        for trigram in sorted(
+            query_trigrams, key=lambda trigram: len(self.postings.get(trigram, ()))
+        ):
+            query_frequency = query_trigrams[trigram]
+            postings = self.postings.get(trigram)
+            if not postings:
+                # Unknown trigrams still count in the score a result needs
+                max_score += query_frequency * math.log(1 + document_count + 0.5)
+                continue
+            idf = math.log(
+                1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5)
+            )
+            max_score += query_frequency * idf
+            weight = query_frequency * idf * (K1 + 1)
+            if not scores:
+                scores = {
+                    doc_id: weight * frequency / (frequency + norms[doc_id])
+                    for doc_id, frequency in postings.items()
+                }
+                continue
+            if len(postings) > max_candidates:
+                doc_ids = scores.keys() & postings.keys()
+            else:
+                doc_ids = postings.keys()
+            for doc_id in doc_ids:
+                frequency = postings[doc_id]
+                scores[doc_id] = scores.get(doc_id, 0.0) + weight * frequency / (
+                    frequency + norms[doc_id]
+                )
+
+        # Only one form of the last word matches, the alternatives score the found
+        # candidates and the best of them counts in the score a result needs
+        max_alternative_idf = 0.0
+        for trigram in alternative_trigrams:
+            postings = self.postings.get(trigram)
+            if not postings:
+                continue
+            idf = math.log(
+                1 + (document_count - len(postings) + 0.5) / (len(postings) + 0.5)
+            )
+            max_alternative_idf = max(max_alternative_idf, idf)
+            for doc_id in scores.keys() & postings.keys():
+                frequency = postings[doc_id]
+                scores[doc_id] += (
+                    idf * (K1 + 1) * frequency / (frequency + norms[doc_id])
+                )
+        max_score += max_alternative_idf
+
+        min_score = max_score * MIN_SCORE_RATIO
+        candidates = [
+            (doc_id, score)
+            for doc_id, score in nlargest(limit * 2, scores.items(), key=itemgetter(1))
+            if score >= min_score
+        ]
+
+        # Exact & prefix matches rank first among the closest candidates
+        query_key = get_search_key(query)
+        prefix_key = get_prefix_key(query)
+        results = []
+        for doc_id, score in candidates:
+            keys = self.document_keys[doc_id]
+            if query_key in keys:
+                score += EXACT_MATCH_BOOST * max_score
+            elif any(
+                key.startswith(query_key) or key.startswith(prefix_key) for key in keys
+            ):
+                score += PREFIX_MATCH_BOOST * max_score
+            results.append((score, doc_id))
+        results.sort(key=lambda result: (-result[0], result[1]))
+        return [doc_id for _, doc_id in results[:limit]]
+
+
+class SearchCache:
+    """
+    Caches the search results by type & normalized query, so the queries typed
+    with a different case, spacing or spelling variation share their entry.
+    Entries expire after the ttl and the type is invalidated when new titles are
+    ingested. The query counts keep the popular queries to prefetch.
+    """
+
+    def __init__(self, ttl: int, max_entries: int = 1024, max_tracked: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_tracked = max_tracked
+        self.entries: OrderedDict[tuple[str, str], tuple[float, Any]] = OrderedDict()
+        self.query_counts: Counter[tuple[str, str]] = Counter()
+        self.queries: dict[tuple[str, str], str] = {}
+        self.metrics = {"hits": 0, "misses": 0}
+
+    def get(self, catalog_type: str, query: str) -> Optional[Any]:
+        key = (catalog_type, get_search_key(query))
+        self._count(key, query)
+        entry = self.entries.get(key)
+        if entry is None or entry[0] < time.monotonic():
+            self.entries.pop(key, None)
+            self.metrics["misses"] += 1
+            return None
+        self.entries.move_to_end(key)
+        self.metrics["hits"] += 1
+        return entry[1]
+
+    def set(self, catalog_type: str, query: str, result: Any):
+        key = (catalog_type, get_search_key(query))
+        self.entries[key] = (time.monotonic() + self.ttl, result)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def is_cached(self, catalog_type: str, query: str) -> bool:
+        entry = self.entries.get((catalog_type, get_search_key(query)))
+        return entry is not None and entry[0] >= time.monotonic()
+
+    def invalidate(self, catalog_type: Optional[str] = None):
+        for key in [key for key in self.entries if catalog_type in (None, key[0])]:
+            del self.entries[key]
+
+    def get_popular_queries(self, limit: int) -> list[tuple[str, str]]:
+        """
+        Returns the (type, query) of the most searched normalized queries.
+        """
+        return [
+            (key[0], self.queries[key])
+            for key, _ in self.query_counts.most_common(limit)
+        ]
+
+    def _count(self, key: tuple[str, str], query: str):
+        self.query_counts[key] += 1
+        self.queries[key] = query
+        if len(self.query_counts) > self.max_tracked:
+            # Keeps the most searched half, halving their counts to favor new queries
+            self.query_counts = Counter(
+                {
+                    tracked_key: count // 2
+                    for tracked_key, count in self.query_counts.most_common(
+                        self.max_tracked // 2
+                    )
+                }
+            )
+            self.queries = {
+                tracked_key: self.queries[tracked_key]
+                for tracked_key in self.query_counts
+            }
@@ -0,0 +1,53 @@
+import re
+from functools import lru_cache
+
+import PTN
+
+PARSE_CACHE_SIZE = 8192
+
+# Fast path for the common episode patterns. ex: "Show.S01E05.mkv", "Show EP05.mkv"
+# Multi episode files (ex: S01E01-E03, S01E01E02) are left to PTN.
+SEASON_EPISODE_PATTERN = re.compile(
+    r"(?<![a-z0-9])s(\d{1,2})[ ._-]?e(\d{1,3})(?![0-9])(?![ ._-]?(?:e|-)\d)",
+    re.IGNORECASE,
+)
+EPISODE_PATTERN = re.compile(
+    r"(?<![a-z0-9])ep(?:isode)?[ ._-]?(\d{1,3})(?![0-9])(?![ ._-]?(?:e|ep|-)\d)",
+    re.IGNORECASE,
+)
+SEASON_PATTERN = re.compile(r"(?<![a-z0-9])s(?:eason)?[ ._-]?\d", re.IGNORECASE)
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def _parse_title(name: str) -> dict:
+    return PTN.parse(name)
+
+
+def parse_title(name: str) -> dict:
+    """
+    Memoized PTN.parse. Returns a copy since the callers update the parsed data.
+    """
+    return dict(_parse_title(name))
+
+
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
+def parse_episode_info(filename: str) -> tuple:
+    """
+    Returns the (season, episode) of the filename, trying the compiled
+    episode patterns before falling back to the full PTN parse.
+    """
+    match = SEASON_EPISODE_PATTERN.search(filename)
+    if match:
+        return int(match[1]), int(match[2])
+
+    match = EPISODE_PATTERN.search(filename)
+    if match and not SEASON_PATTERN.search(filename):
+        return None, int(match[1])
+
+    parsed_data = _parse_title(filename)
+    return parsed_data.get("season"), parsed_data.get("episode")
+
+
+def clear_parse_caches():
+    parse_episode_info.cache_clear()
+    _parse_title.cache_clear()
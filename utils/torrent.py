@@ -1,11 +1,16 @@
+import asyncio
+import copy
 import hashlib
 import logging
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
 from urllib.parse import quote
 
-import PTN
 import bencodepy
 
 from utils.parser import clean_name
+from utils.title_parser import parse_episode_info
 
 TRACKERS = [
     "udp://tracker.openbittorrent.com:80/announce",
@@ -23,64 +28,164 @@ TRACKERS = [
 ]
 
 
-def extract_torrent_metadata(content) -> dict:
-    try:
-        torrent_data = bencodepy.decode(content)
-
-        info = torrent_data[b"info"]
-        info_encoded = bencodepy.encode(info)
-
-        m = hashlib.sha1()
-        m.update(info_encoded)
-        info_hash = m.hexdigest()
-
-        # Extract file size, file list, and announce list
-        if b"files" in info:
-            total_size = sum(file[b"length"] for file in info[b"files"])
-            file_data = []
-            for idx, file in enumerate(info[b"files"]):
-                filename = file[b"path"][0].decode()
-                parsed_data = PTN.parse(filename)
-                file_data.append(
-                    {
-                        "filename": filename,
-                        "size": file[b"length"],
-                        "index": idx,
-                        "season": parsed_data.get("season"),
-                        "episode": parsed_data.get("episode"),
-                    }
-                )
-        else:
-            total_size = info[b"length"]
-            filename = info[b"name"].decode()
-            parsed_data = PTN.parse(filename)
-            file_data = [
+# Multi-file torrents with at least this many files are parsed in the process pool
+PROCESS_POOL_FILE_THRESHOLD = 50
+PARSE_CACHE_SIZE = 2048
+
+_parse_cache: OrderedDict[str, dict] = OrderedDict()
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor()
+    return _process_pool
+
+
+def skip_bencoded_value(content: bytes, index: int) -> int:
+    """
+    Returns the index right after the bencoded value starting at the given index.
+    """
+    token = content[index : index + 1]
+    if token == b"i":
+        return content.index(b"e", index) + 1
+    if token in (b"l", b"d"):
+        index += 1
+        while content[index : index + 1] != b"e":
+            index = skip_bencoded_value(content, index)
+        return index + 1
+    if token.isdigit():
+        colon = content.index(b":", index)
+        return colon + 1 + int(content[index:colon])
+    raise ValueError(f"Invalid bencoded data at index {index}")
+
+
+def get_info_hash(content: bytes) -> str:
+    """
+    Computes the info hash from the raw byte span of the `info` dictionary,
+    so the decoded torrent never has to be re-encoded.
+    """
+    if content[:1] != b"d":
+        raise ValueError("Torrent content is not a bencoded dictionary")
+
+    index = 1
+    while content[index : index + 1] != b"e":
+        key_end = skip_bencoded_value(content, index)
+        key = content[content.index(b":", index) + 1 : key_end]
+        value_end = skip_bencoded_value(content, key_end)
+        if key == b"info":
+            return hashlib.sha1(content[key_end:value_end]).hexdigest()
+        index = value_end
+    raise ValueError("Torrent content has no info dictionary")
+
+
+def parse_torrent_metadata(content: bytes) -> dict:
+    torrent_data = bencodepy.decode(content)
+
+    info = torrent_data[b"info"]
+    info_hash = get_info_hash(content)
+
+    # Extract file size, file list, and announce list
+    if b"files" in info:
+        total_size = sum(file[b"length"] for file in info[b"files"])
+        file_data = []
+        for idx, file in enumerate(info[b"files"]):
+            filename = file[b"path"][0].decode()
+            season, episode = parse_episode_info(filename)
+            file_data.append(
                 {
                     "filename": filename,
-                    "size": total_size,
-                    "index": 0,
-                    "season": parsed_data.get("season"),
-                    "episode": parsed_data.get("episode"),
+                    "size": file[b"length"],
+                    "index": idx,
+                    "season": season,
+                    "episode": episode,
                 }
-            ]
-
-        announce_list = [
-            tracker[0].decode() for tracker in torrent_data.get(b"announce-list", [])
+            )
+    else:
+        total_size = info[b"length"]
+        filename = info[b"name"].decode()
+        season, episode = parse_episode_info(filename)
+        file_data = [
+            {
+                "filename": filename,
+                "size": total_size,
+                "index": 0,
+                "season": season,
+                "episode": episode,
+            }
         ]
-        torrent_name = info.get(b"name", b"").decode() or file_data[0]["filename"]
 
-        return {
-            "info_hash": info_hash,
-            "announce_list": announce_list,
-            "total_size": total_size,
-            "file_data": file_data,
-            "torrent_name": torrent_name,
-        }
+    announce_list = [
+        tracker[0].decode() for tracker in torrent_data.get(b"announce-list", [])
+    ]
+    torrent_name = info.get(b"name", b"").decode() or file_data[0]["filename"]
+
+    return {
+        "info_hash": info_hash,
+        "announce_list": announce_list,
+        "total_size": total_size,
+        "file_data": file_data,
+        "torrent_name": torrent_name,
+    }
+
 
+def get_cached_torrent_metadata(cache_key: str) -> Optional[dict]:
+    metadata = _parse_cache.get(cache_key)
+    if metadata:
+        _parse_cache.move_to_end(cache_key)
+        # Cached entries are never handed out, the callers may update their copy
+        return copy.deepcopy(metadata)
+    return metadata
+
+
+def cache_torrent_metadata(cache_key: str, metadata: dict):
+    _parse_cache[cache_key] = copy.deepcopy(metadata)
+    if len(_parse_cache) > PARSE_CACHE_SIZE:
+        _parse_cache.popitem(last=False)
+
+
+def extract_torrent_metadata(content: bytes) -> dict:
+    cache_key = hashlib.sha1(content).hexdigest()
+    metadata = get_cached_torrent_metadata(cache_key)
+    if metadata:
+        return metadata
+
+    try:
+        metadata = parse_torrent_metadata(content)
+    except Exception as e:
+        logging.error(f"Error occurred: {e}")
+        return {}
+
+    cache_torrent_metadata(cache_key, metadata)
+    return metadata
+
+
+async def extract_torrent_metadata_async(content: bytes) -> dict:
+    """
+    Same as extract_torrent_metadata, but large multi-file torrents (ex: season packs)
+    are parsed in a process pool to keep the event loop responsive.
+    """
+    if content.count(b"4:path") < PROCESS_POOL_FILE_THRESHOLD:
+        return extract_torrent_metadata(content)
+
+    cache_key = hashlib.sha1(content).hexdigest()
+    metadata = get_cached_torrent_metadata(cache_key)
+    if metadata:
+        return metadata
+
+    loop = asyncio.get_running_loop()
+    try:
+        metadata = await loop.run_in_executor(
+            get_process_pool(), parse_torrent_metadata, content
+        )
     except Exception as e:
         logging.error(f"Error occurred: {e}")
         return {}
 
+    cache_torrent_metadata(cache_key, metadata)
+    return metadata
+
 
 def convert_info_hash_to_magnet(info_hash: str, trackers: list[str]) -> str:
     magnet_link = f"magnet:?xt=urn:btih:{info_hash}"